@@ -0,0 +1,221 @@
+"""Synthetic media corpus for the benchmark harness.
+
+Everything is generated locally from a fixed seed, so two runs on the same machine measure the
+same bytes. The corpus is reused while its manifest matches the requested layout.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from PIL import Image
+
+_MANIFEST_NAME = "manifest.json"
+_CORPUS_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CorpusLayout:
+    image_sizes: tuple[tuple[int, int], ...] = ((512, 512), (1920, 1080), (3840, 2160))
+    animated_sizes: tuple[tuple[int, int], ...] = ((512, 512), (1280, 720))
+    animated_frames: int = 12
+    batch_image_size: tuple[int, int] = (1024, 768)
+    batch_image_count: int = 64
+    video_sizes: tuple[tuple[int, int], ...] = ((640, 360), (1280, 720), (1920, 1080))
+    video_codecs: tuple[str, ...] = ("h264", "vp9")
+    video_frames: int = 72
+    video_fps: int = 24
+    tree_depth: int = 4
+    tree_fanout: int = 6
+    tree_files_per_dir: int = 8
+
+
+QUICK_LAYOUT = CorpusLayout(
+    image_sizes=((512, 512), (1920, 1080)),
+    animated_sizes=((512, 512),),
+    animated_frames=6,
+    batch_image_count=16,
+    video_sizes=((640, 360),),
+    video_frames=24,
+    tree_depth=3,
+    tree_fanout=4,
+    tree_files_per_dir=6,
+)
+
+
+@dataclass
+class Corpus:
+    root: str
+    # Keys such as "png_1920x1080" / "h264_1280x720" map to paths relative to root.
+    images: dict[str, str] = field(default_factory=dict)
+    videos: dict[str, str] = field(default_factory=dict)
+    batch_images: list[str] = field(default_factory=list)
+    tree_dir: str = ""
+    tree_file_count: int = 0
+    skipped: list[str] = field(default_factory=list)
+
+    def path(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+
+# VP9 needs libvpx in the FFmpeg build PyAV ships with; missing encoders are skipped, not fatal.
+_VIDEO_ENCODERS = {
+    "h264": ("libx264", "mp4", {"preset": "veryfast", "crf": "23"}),
+    "vp9": ("libvpx-vp9", "webm", {"deadline": "realtime", "cpu-used": "8", "crf": "32", "b": "0"}),
+}
+
+
+def _synthetic_frame(width: int, height: int, step: int, rng: np.random.Generator) -> np.ndarray:
+    # Moving gradients plus mild noise: compresses like camera footage, not like a flat fill.
+    ys = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    xs = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    frame = np.empty((height, width, 3), dtype=np.float32)
+    frame[..., 0] = (xs + step * 7) % 256
+    frame[..., 1] = (ys + step * 3) % 256
+    frame[..., 2] = (xs * 0.5 + ys * 0.5 + step * 11) % 256
+    frame += rng.normal(0.0, 6.0, size=(height, width, 1)).astype(np.float32)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def _size_label(size: tuple[int, int]) -> str:
+    return f"{size[0]}x{size[1]}"
+
+
+def _write_images(corpus: Corpus, layout: CorpusLayout, rng: np.random.Generator) -> None:
+    image_dir = os.path.join(corpus.root, "images")
+    os.makedirs(image_dir, exist_ok=True)
+
+    for size in layout.image_sizes:
+        label = _size_label(size)
+        still = Image.fromarray(_synthetic_frame(size[0], size[1], 0, rng))
+        for key, file_name, save_options in (
+            (f"png_{label}", f"still_{label}.png", {"compress_level": 6}),
+            (f"jpeg_{label}", f"still_{label}.jpg", {"quality": 90}),
+        ):
+            still.save(os.path.join(image_dir, file_name), **save_options)
+            corpus.images[key] = os.path.join("images", file_name)
+
+    for size in layout.animated_sizes:
+        label = _size_label(size)
+        frames = [
+            Image.fromarray(_synthetic_frame(size[0], size[1], step, rng))
+            for step in range(layout.animated_frames)
+        ]
+        file_name = f"animated_{label}.webp"
+        frames[0].save(
+            os.path.join(image_dir, file_name),
+            save_all=True,
+            append_images=frames[1:],
+            duration=80,
+            quality=80,
+        )
+        corpus.images[f"webp_anim_{label}"] = os.path.join("images", file_name)
+
+    batch_dir = os.path.join(image_dir, "batch")
+    os.makedirs(batch_dir, exist_ok=True)
+    width, height = layout.batch_image_size
+    for position in range(layout.batch_image_count):
+        file_name = f"batch_{position:04d}.jpg"
+        Image.fromarray(_synthetic_frame(width, height, position, rng)).save(
+            os.path.join(batch_dir, file_name), quality=90
+        )
+        corpus.batch_images.append(os.path.join("images", "batch", file_name))
+
+
+def _write_video(
+    file_path: str, codec: str, size: tuple[int, int], layout: CorpusLayout, rng: np.random.Generator
+) -> None:
+    import av
+
+    encoder, _, options = _VIDEO_ENCODERS[codec]
+    with av.open(file_path, mode="w") as container:
+        stream = container.add_stream(encoder, rate=layout.video_fps, options=dict(options))
+        stream.width, stream.height = size
+        stream.pix_fmt = "yuv420p"
+        for step in range(layout.video_frames):
+            frame = av.VideoFrame.from_ndarray(_synthetic_frame(size[0], size[1], step, rng), format="rgb24")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def _write_videos(corpus: Corpus, layout: CorpusLayout, rng: np.random.Generator) -> None:
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        corpus.skipped.append("videos: PyAV is not installed")
+        return
+
+    video_dir = os.path.join(corpus.root, "videos")
+    os.makedirs(video_dir, exist_ok=True)
+    for codec in layout.video_codecs:
+        container_ext = _VIDEO_ENCODERS[codec][1]
+        for size in layout.video_sizes:
+            label = _size_label(size)
+            file_name = f"{codec}_{label}.{container_ext}"
+            file_path = os.path.join(video_dir, file_name)
+            try:
+                _write_video(file_path, codec, size, layout, rng)
+            except Exception as exc:
+                corpus.skipped.append(f"{codec}_{label}: {exc}")
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                continue
+            corpus.videos[f"{codec}_{label}"] = os.path.join("videos", file_name)
+
+
+def _write_tree(corpus: Corpus, layout: CorpusLayout) -> None:
+    # Scan benchmarks only look at names and directory structure, so empty files are enough.
+    tree_dir = os.path.join(corpus.root, "tree")
+    # A previous, larger layout would otherwise leave extra directories behind.
+    shutil.rmtree(tree_dir, ignore_errors=True)
+    pending = [(tree_dir, 0)]
+    file_count = 0
+    while pending:
+        dir_path, depth = pending.pop()
+        os.makedirs(dir_path, exist_ok=True)
+        for position in range(layout.tree_files_per_dir):
+            ext = ".png" if position % 4 else ".mp4"
+            open(os.path.join(dir_path, f"item_{position:03d}{ext}"), "wb").close()
+            file_count += 1
+        open(os.path.join(dir_path, "notes.txt"), "wb").close()
+        if depth < layout.tree_depth:
+            pending.extend(
+                (os.path.join(dir_path, f"d{child:02d}"), depth + 1) for child in range(layout.tree_fanout)
+            )
+
+    corpus.tree_dir = "tree"
+    corpus.tree_file_count = file_count
+
+
+def ensure_corpus(root: str, layout: CorpusLayout, seed: int = 1234) -> Corpus:
+    root = os.path.abspath(root)
+    manifest_path = os.path.join(root, _MANIFEST_NAME)
+    wanted = {"version": _CORPUS_VERSION, "seed": seed, "layout": asdict(layout)}
+
+    try:
+        with open(manifest_path, encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        manifest = None
+    # JSON turns the layout tuples into lists, so compare through the same round trip.
+    if manifest is not None and manifest.get("spec") == json.loads(json.dumps(wanted)):
+        return Corpus(root=root, **manifest["corpus"])
+
+    os.makedirs(root, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    corpus = Corpus(root=root)
+    _write_images(corpus, layout, rng)
+    _write_videos(corpus, layout, rng)
+    _write_tree(corpus, layout)
+
+    corpus_fields = asdict(corpus)
+    corpus_fields.pop("root")
+    with open(manifest_path, "w", encoding="utf-8") as handle:
+        json.dump({"spec": wanted, "corpus": corpus_fields}, handle, indent=2)
+    return corpus
@@ -0,0 +1,437 @@
+"""Throughput benchmarks for the batch loaders, directory scans and the preview token registry.
+
+Usage (from the repository root, in a Python env with torch, numpy, Pillow and PyAV):
+
+    python benchmarks/run_benchmarks.py [--quick] [--repeat N] [--only NAME ...] [--json out.json]
+
+ComfyUI itself is not needed: ``folder_paths`` and ``node_helpers`` are replaced by small stand-ins
+that point the input directory at the synthetic corpus, and the node pack is imported under a
+synthetic package name so its root ``__init__`` (which registers server routes) never runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from corpus import QUICK_LAYOUT, Corpus, CorpusLayout, ensure_corpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PACKAGE_NAME = "gugu_batch_bench"
+_RSS_SAMPLE_SECONDS = 0.005
+
+
+@dataclass
+class BenchResult:
+    name: str
+    best_seconds: float
+    median_seconds: float
+    items: int
+    unit: str
+    input_bytes: int
+    peak_rss_mb: float | None
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.best_seconds if self.best_seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        if self.best_seconds <= 0:
+            return 0.0
+        return self.input_bytes / (1024 * 1024) / self.best_seconds
+
+
+class _PeakRssSampler:
+    """Samples resident memory in the background; ru_maxrss only ever reports the process peak."""
+
+    def __init__(self) -> None:
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _read_rss(self) -> int | None:
+        try:
+            with open("/proc/self/statm", encoding="ascii") as handle:
+                return int(handle.read().split()[1]) * self._page_size
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(_RSS_SAMPLE_SECONDS):
+            rss = self._read_rss()
+            if rss is not None and rss > self._peak:
+                self._peak = rss
+
+    def __enter__(self) -> _PeakRssSampler:
+        self._peak = self._read_rss() or 0
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def peak_mb(self) -> float | None:
+        if self._peak:
+            return self._peak / (1024 * 1024)
+        try:
+            import resource
+        except ImportError:
+            return None
+        # Linux reports KiB, macOS reports bytes.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+def _install_host_stubs(input_dir: str, temp_dir: str) -> None:
+    folder_paths = types.ModuleType("folder_paths")
+    annotated_dirs = {"[input]": input_dir, "[temp]": temp_dir, "[output]": temp_dir}
+
+    def get_annotated_filepath(name: str) -> str:
+        for annotation, base_dir in annotated_dirs.items():
+            if name.endswith(f" {annotation}"):
+                return os.path.join(base_dir, name[: -len(annotation) - 1])
+        return os.path.join(input_dir, name)
+
+    folder_paths.get_input_directory = lambda: input_dir
+    folder_paths.get_temp_directory = lambda: temp_dir
+    folder_paths.get_annotated_filepath = get_annotated_filepath
+    folder_paths.exists_annotated_filepath = lambda name: os.path.exists(get_annotated_filepath(name))
+
+    node_helpers = types.ModuleType("node_helpers")
+
+    def pillow(fn, arg):
+        # Same retry ComfyUI's node_helpers.pillow does for truncated files.
+        from PIL import ImageFile, UnidentifiedImageError
+
+        try:
+            return fn(arg)
+        except (OSError, UnidentifiedImageError, ValueError):
+            previous = ImageFile.LOAD_TRUNCATED_IMAGES
+            ImageFile.LOAD_TRUNCATED_IMAGES = True
+            try:
+                return fn(arg)
+            finally:
+                ImageFile.LOAD_TRUNCATED_IMAGES = previous
+
+    node_helpers.pillow = pillow
+    sys.modules["folder_paths"] = folder_paths
+    sys.modules["node_helpers"] = node_helpers
+
+
+def _import_node_pack() -> types.SimpleNamespace:
+    package = types.ModuleType(_PACKAGE_NAME)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[_PACKAGE_NAME] = package
+    return types.SimpleNamespace(
+        core=importlib.import_module(f"{_PACKAGE_NAME}.core"),
+        dir_index=importlib.import_module(f"{_PACKAGE_NAME}.core.dir_index"),
+        services=importlib.import_module(f"{_PACKAGE_NAME}.services"),
+        nodes=importlib.import_module(f"{_PACKAGE_NAME}.nodes"),
+    )
+
+
+@dataclass
+class BenchCase:
+    name: str
+    # Runs one round and returns how many items (frames, files, tokens) it processed.
+    run: Callable[[], int]
+    unit: str
+    input_bytes: int = 0
+    setup: Callable[[], None] | None = None
+    warmup: bool = True
+    rounds: int | None = None
+
+
+def _measure(case: BenchCase, repeat: int) -> BenchResult:
+    if case.warmup:
+        if case.setup is not None:
+            case.setup()
+        case.run()
+
+    timings: list[float] = []
+    items = 0
+    with _PeakRssSampler() as sampler:
+        for _ in range(max(case.rounds or repeat, 1)):
+            if case.setup is not None:
+                case.setup()
+            gc.collect()
+            started = time.perf_counter()
+            items = case.run()
+            timings.append(time.perf_counter() - started)
+
+    return BenchResult(
+        name=case.name,
+        best_seconds=min(timings),
+        median_seconds=statistics.median(timings),
+        items=items,
+        unit=case.unit,
+        input_bytes=case.input_bytes,
+        peak_rss_mb=sampler.peak_mb,
+    )
+
+
+def _file_bytes(corpus: Corpus, relative_paths) -> int:
+    return sum(os.path.getsize(corpus.path(relative_path)) for relative_path in relative_paths)
+
+
+def _input_name(relative_path: str) -> str:
+    return relative_path.replace(os.sep, "/")
+
+
+def _image_cases(pack, corpus: Corpus, args) -> list[BenchCase]:
+    services = pack.services
+    cases: list[BenchCase] = []
+
+    for key, relative_path in corpus.images.items():
+
+        def run_tensor(file_path=corpus.path(relative_path)) -> int:
+            tensor = services.load_image_tensor(file_path)
+            return int(tensor.shape[0]) if tensor is not None else 0
+
+        cases.append(
+            BenchCase(f"load_image_tensor[{key}]", run_tensor, "frames", _file_bytes(corpus, [relative_path]))
+        )
+
+    image_node = pack.nodes.GuguBatchLoadImages
+    image_list = "\n".join(_input_name(relative_path) for relative_path in corpus.batch_images)
+    batch_bytes = _file_bytes(corpus, corpus.batch_images)
+
+    for workers in sorted({1, args.workers}):
+
+        def run_node(workers=workers) -> int:
+            images, _, _ = image_node().load_images(image_list, 0, "batch", 0, decode_workers=workers)
+            return int(images.shape[0])
+
+        cases.append(
+            BenchCase(f"GuguBatchLoadImages.load_images[workers={workers}]", run_node, "frames", batch_bytes)
+        )
+
+    for change_detection in ("stat", "content_memo", "content"):
+
+        def run_hash(change_detection=change_detection) -> int:
+            image_node.IS_CHANGED(image_list, 0, "batch", 0, change_detection=change_detection)
+            return len(corpus.batch_images)
+
+        cases.append(
+            BenchCase(
+                f"GuguBatchLoadImages.IS_CHANGED[{change_detection}]",
+                run_hash,
+                "files",
+                batch_bytes if change_detection == "content" else 0,
+            )
+        )
+    return cases
+
+
+def _video_cases(pack, corpus: Corpus, args) -> list[BenchCase]:
+    if not corpus.videos:
+        return []
+
+    services = pack.services
+    cases: list[BenchCase] = []
+
+    for key, relative_path in corpus.videos.items():
+        for max_edge in sorted({0, args.max_edge}):
+
+            def run_decode(file_path=corpus.path(relative_path), max_edge=max_edge) -> int:
+                output = services.FrameBatchBuilder()
+                result = services.decode_video_frames(file_path, 0, 0, 1, output=output, max_edge=max_edge)
+                output.build()
+                return result.frame_count
+
+            name = f"decode_video_frames[{key}]" + (f"[max_edge={max_edge}]" if max_edge else "")
+            cases.append(BenchCase(name, run_decode, "frames", _file_bytes(corpus, [relative_path])))
+
+    # Clips of one resolution, so every listed video lands in the same batch.
+    first_size = next(iter(corpus.videos)).split("_", 1)[1]
+    batch_videos = [path for key, path in corpus.videos.items() if key.endswith(f"_{first_size}")]
+    video_list = "\n".join(_input_name(relative_path) for relative_path in batch_videos)
+    batch_bytes = _file_bytes(corpus, batch_videos)
+    video_node = pack.nodes.GuguBatchLoadVideos
+
+    for workers in sorted({1, args.workers}):
+
+        def run_node(workers=workers) -> int:
+            images = video_node().load_videos(video_list, 0, "batch", 0, 0, 0, 1, decode_workers=workers)[0]
+            return int(images.shape[0])
+
+        name = f"GuguBatchLoadVideos.load_videos[{first_size},workers={workers}]"
+        cases.append(BenchCase(name, run_node, "frames", batch_bytes))
+
+    def run_hash() -> int:
+        video_node.IS_CHANGED(video_list, 0, "batch", 0, 0, 0, 1)
+        return len(batch_videos)
+
+    cases.append(BenchCase("GuguBatchLoadVideos.IS_CHANGED", run_hash, "files"))
+    return cases
+
+
+def _scan_cases(pack, corpus: Corpus, args) -> list[BenchCase]:
+    core = pack.core
+    services = pack.services
+    tree_dir = corpus.path(corpus.tree_dir)
+
+    def cold_index() -> None:
+        pack.dir_index.directory_index.clear()
+
+    def list_images() -> int:
+        return len(core.list_images_from_server_dir(tree_dir))
+
+    def list_videos() -> int:
+        return len(core.list_videos_from_server_dir(tree_dir))
+
+    def first_page() -> int:
+        return services.build_image_scan_payload(tree_dir, 0, page_size=200)["count"]
+
+    return [
+        BenchCase("list_images_from_server_dir[cold]", list_images, "files", setup=cold_index),
+        BenchCase("list_images_from_server_dir[warm]", list_images, "files"),
+        BenchCase("list_videos_from_server_dir[warm]", list_videos, "files"),
+        BenchCase("build_image_scan_payload[first page of 200, cold]", first_page, "files", setup=cold_index),
+    ]
+
+
+def _preview_cases(pack, corpus: Corpus, args) -> list[BenchCase]:
+    services = pack.services
+    tree_entries = pack.core.list_images_from_server_dir(corpus.path(corpus.tree_dir))
+    tree_paths = [entry.source_path for entry in tree_entries]
+    tokens: list[str | None] = []
+
+    def register_first() -> int:
+        tokens[:] = services.register_preview_files(tree_paths)
+        return len(tree_paths)
+
+    def register_refresh() -> int:
+        services.register_preview_files(tree_paths)
+        return len(tree_paths)
+
+    def resolve_concurrently() -> int:
+        if not tokens:
+            register_first()
+        live_tokens = [token for token in tokens if token]
+        chunk = max(len(live_tokens) // args.workers, 1)
+        chunks = [live_tokens[start : start + chunk] for start in range(0, len(live_tokens), chunk)]
+
+        def resolve_chunk(chunk_tokens: list[str]) -> int:
+            return sum(1 for token in chunk_tokens if services.resolve_preview_file(token))
+
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            return sum(executor.map(resolve_chunk, chunks))
+
+    return [
+        # Registration is only "first" once per process, so it runs a single, un-warmed round.
+        BenchCase("register_preview_files[first]", register_first, "tokens", warmup=False, rounds=1),
+        BenchCase("register_preview_files[refresh]", register_refresh, "tokens"),
+        BenchCase(f"resolve_preview_file[{args.workers} threads]", resolve_concurrently, "tokens"),
+    ]
+
+
+def _format_row(result: BenchResult) -> str:
+    rss = f"{result.peak_rss_mb:9.1f}" if result.peak_rss_mb is not None else f"{'-':>9}"
+    mb_rate = f"{result.mb_per_second:9.1f}" if result.input_bytes else f"{'-':>9}"
+    return (
+        f"{result.name:<58} {result.best_seconds * 1000:10.2f} {result.median_seconds * 1000:10.2f} "
+        f"{result.items_per_second:12.1f} {result.unit:<7} {mb_rate} {rss}"
+    )
+
+
+def _library_versions() -> dict[str, str]:
+    versions = {"python": sys.version.split()[0]}
+    for module_name in ("torch", "numpy", "PIL", "av"):
+        try:
+            versions[module_name] = getattr(importlib.import_module(module_name), "__version__", "?")
+        except ImportError:
+            versions[module_name] = "missing"
+    return versions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--corpus-dir",
+        default=os.path.join(tempfile.gettempdir(), "gugu_batch_bench_corpus"),
+        help="where the synthetic corpus is generated and reused from",
+    )
+    parser.add_argument("--quick", action="store_true", help="smaller corpus for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="decode_workers / threads of parallel variants")
+    parser.add_argument("--max-edge", type=int, default=512, help="extra decode_video_frames variant, 0 = none")
+    parser.add_argument("--only", nargs="*", default=[], help="run benchmarks whose name contains any of these")
+    parser.add_argument("--keep-frame-cache", action="store_true", help="leave decoded-frame caches as configured by GUGU_BATCH_FRAME_CACHE_MB / GUGU_BATCH_DISK_CACHE_*")
+    parser.add_argument("--json", dest="json_path", default="", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    layout: CorpusLayout = QUICK_LAYOUT if args.quick else CorpusLayout()
+    corpus_dir = os.path.join(args.corpus_dir, "quick" if args.quick else "full")
+    print(f"corpus: {corpus_dir}")
+    corpus = ensure_corpus(corpus_dir, layout)
+    for reason in corpus.skipped:
+        print(f"skipped: {reason}")
+
+    if not args.keep_frame_cache:
+        # Cache hits would measure a memcpy instead of the decode path.
+        os.environ["GUGU_BATCH_FRAME_CACHE_MB"] = "0"
+        os.environ["GUGU_BATCH_DISK_CACHE_MB"] = "0"
+    # Saved directory snapshots would turn the [cold] scans into reloads of the previous run's index.
+    os.environ["GUGU_BATCH_DIR_INDEX_DIR"] = ""
+    temp_dir = os.path.join(corpus.root, "_temp")
+    os.makedirs(temp_dir, exist_ok=True)
+    _install_host_stubs(corpus.root, temp_dir)
+    pack = _import_node_pack()
+
+    cases: list[BenchCase] = []
+    for collect in (_image_cases, _video_cases, _scan_cases, _preview_cases):
+        cases.extend(collect(pack, corpus, args))
+    if args.only:
+        cases = [case for case in cases if any(pattern in case.name for pattern in args.only)]
+
+    versions = _library_versions()
+    print(" ".join(f"{name}={version}" for name, version in versions.items()))
+    print(
+        f"{'benchmark':<58} {'best ms':>10} {'median ms':>10} {'rate/s':>12} {'unit':<7} "
+        f"{'MB/s':>9} {'peak RSS':>9}"
+    )
+    results: list[BenchResult] = []
+    for case in cases:
+        result = _measure(case, args.repeat)
+        results.append(result)
+        print(_format_row(result), flush=True)
+
+    if args.json_path:
+        payload = {
+            "versions": versions,
+            "layout": asdict(layout),
+            "results": [
+                {
+                    **asdict(result),
+                    "items_per_second": result.items_per_second,
+                    "mb_per_second": result.mb_per_second,
+                }
+                for result in results
+            ],
+        }
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,19 @@
-from .hash_utils import new_sha256, update_hash_with_file_content, update_hash_with_file_stat, update_hash_with_value
-from .list_utils import apply_limit, clamp_single_index, parse_multiline_list, pick_mode_items, select_from_multiline
+from .env_utils import read_env_int
+from .hash_utils import (
+    new_sha256,
+    update_hash_with_file_content,
+    update_hash_with_file_content_memo,
+    update_hash_with_file_stat,
+    update_hash_with_value,
+)
+from .list_utils import (
+    apply_limit,
+    clamp_single_index,
+    parse_multiline_list,
+    pick_mode_items,
+    select_from_multiline,
+    upcoming_single_items,
+)
 from .media_paths import (
     IMAGE_EXTENSIONS,
     InputViewParams,
@@ -8,15 +22,20 @@ from .media_paths import (
     VIDEO_EXTENSIONS,
     build_input_view_params,
     is_previewable_path,
+    iter_images_from_server_dir,
+    iter_videos_from_server_dir,
     list_images_from_server_dir,
     list_video_candidates,
     list_videos_from_server_dir,
     normalize_posix_path,
     resolve_image_path,
+    resolve_media_paths,
     resolve_video_path,
     select_video_names,
     to_input_relative_or_abs,
 )
+from .stage_stats import stage_stats
+from .stat_cache import stat_cache
 
 __all__ = [
     "IMAGE_EXTENSIONS",
@@ -28,6 +47,8 @@ __all__ = [
     "build_input_view_params",
     "clamp_single_index",
     "is_previewable_path",
+    "iter_images_from_server_dir",
+    "iter_videos_from_server_dir",
     "list_images_from_server_dir",
     "list_video_candidates",
     "list_videos_from_server_dir",
@@ -35,12 +56,18 @@ __all__ = [
     "normalize_posix_path",
     "parse_multiline_list",
     "pick_mode_items",
+    "read_env_int",
     "resolve_image_path",
+    "resolve_media_paths",
     "resolve_video_path",
     "select_from_multiline",
     "select_video_names",
+    "stage_stats",
+    "stat_cache",
     "to_input_relative_or_abs",
+    "upcoming_single_items",
     "update_hash_with_file_content",
+    "update_hash_with_file_content_memo",
     "update_hash_with_file_stat",
     "update_hash_with_value",
 ]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+_MAX_INDEXED_DIRS = 200000
+_INDEX_FILE_VERSION = 1
+_INDEX_SUFFIX = ".json"
+_TEMP_SUFFIX = ".tmp"
+# A directory listed this soon after its last change may change again within the same mtime tick.
+_RACY_MTIME_NS = 2_000_000_000
+
+
+@dataclass
+class DirSnapshot:
+    mtime_ns: int
+    file_names: tuple[str, ...]
+    subdir_names: tuple[str, ...]
+    # Per-query views of file_names (e.g. filtered scan entries), rebuilt whenever the directory is rescanned.
+    derived: dict = field(default_factory=dict)
+
+
+class DirectoryIndex:
+    def __init__(self, max_dirs: int, persist_dir: str = "") -> None:
+        self._max_dirs = max(int(max_dirs), 1)
+        self._snapshots: dict[str, DirSnapshot] = {}
+        self._lock = threading.Lock()
+        # Snapshots of a scanned tree are saved per root, so the first scan after a restart only
+        # relists directories whose mtime changed meanwhile.
+        self._persist_dir = os.path.abspath(persist_dir) if persist_dir else ""
+        self._loaded_roots: set[str] = set()
+        self._generation = 0
+        self._saved_generations: dict[str, int] = {}
+
+    def snapshot(self, dir_path: str) -> DirSnapshot | None:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._snapshots.pop(dir_path, None)
+            return None
+
+        with self._lock:
+            snapshot = self._snapshots.get(dir_path)
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+            return snapshot
+
+        snapshot = self._scan(dir_path, mtime_ns)
+        with self._lock:
+            self._store_locked(dir_path, snapshot)
+            self._generation += 1
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._loaded_roots.clear()
+            self._saved_generations.clear()
+
+    def load_tree(self, root: str) -> None:
+        # Seeds snapshots saved by an earlier process; snapshot() still checks each directory's mtime.
+        if not self._persist_dir:
+            return
+        with self._lock:
+            if root in self._loaded_roots:
+                return
+            self._loaded_roots.add(root)
+        try:
+            with open(self._index_path(root), "r", encoding="utf-8") as handle:
+                saved = json.load(handle)
+            if saved.get("version") != _INDEX_FILE_VERSION or saved.get("root") != root:
+                return
+            loaded = {
+                dir_path: DirSnapshot(mtime_ns=int(mtime_ns), file_names=tuple(files), subdir_names=tuple(subdirs))
+                for dir_path, (mtime_ns, files, subdirs) in saved["dirs"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError):
+            return
+        with self._lock:
+            for dir_path, snapshot in loaded.items():
+                if dir_path not in self._snapshots:
+                    self._store_locked(dir_path, snapshot)
+            self._saved_generations[root] = self._generation
+
+    def save_tree(self, root: str) -> None:
+        if not self._persist_dir:
+            return
+        prefix = os.path.join(root, "")
+        with self._lock:
+            if self._saved_generations.get(root) == self._generation:
+                return
+            generation = self._generation
+            dirs = {
+                dir_path: [snapshot.mtime_ns, snapshot.file_names, snapshot.subdir_names]
+                for dir_path, snapshot in self._snapshots.items()
+                if snapshot.mtime_ns >= 0 and (dir_path == root or dir_path.startswith(prefix))
+            }
+
+        index_path = self._index_path(root)
+        temp_path = f"{index_path}.{os.getpid()}.{secrets.token_hex(4)}{_TEMP_SUFFIX}"
+        try:
+            os.makedirs(self._persist_dir, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": _INDEX_FILE_VERSION, "root": root, "dirs": dirs}, handle)
+            os.replace(temp_path, index_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._saved_generations[root] = generation
+
+    def _index_path(self, root: str) -> str:
+        name = hashlib.sha256(root.encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self._persist_dir, name + _INDEX_SUFFIX)
+
+    def _store_locked(self, dir_path: str, snapshot: DirSnapshot) -> None:
+        self._snapshots.pop(dir_path, None)
+        self._snapshots[dir_path] = snapshot
+        while len(self._snapshots) > self._max_dirs:
+            del self._snapshots[next(iter(self._snapshots))]
+
+    @staticmethod
+    def _scan(dir_path: str, mtime_ns: int) -> DirSnapshot:
+        file_names: list[str] = []
+        subdir_names: list[str] = []
+        try:
+            with os.scandir(dir_path) as iterator:
+                for entry in iterator:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        file_names.append(entry.name)
+                    elif not entry.is_symlink():
+                        # Same as os.walk: symlinked directories are not descended into.
+                        subdir_names.append(entry.name)
+        except OSError:
+            mtime_ns = -1
+
+        if time.time_ns() - mtime_ns < _RACY_MTIME_NS:
+            mtime_ns = -1
+        return DirSnapshot(
+            mtime_ns=mtime_ns,
+            file_names=tuple(sorted(file_names)),
+            subdir_names=tuple(sorted(subdir_names)),
+        )
+
+
+# Outside ComfyUI's temp directory, which ComfyUI empties on every start. An empty value disables saving.
+directory_index = DirectoryIndex(
+    _MAX_INDEXED_DIRS,
+    os.environ.get("GUGU_BATCH_DIR_INDEX_DIR", os.path.join(tempfile.gettempdir(), "gugu_batch_dir_index")).strip(),
+)
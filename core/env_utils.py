@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import os
+
+
+def read_env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
@@ -2,8 +2,16 @@ from __future__ import annotations
 
 import hashlib
 import os
+import stat as stat_module
+import threading
+from collections import OrderedDict
 from typing import Hashable
 
+_MAX_CONTENT_DIGEST_MEMO = 100000
+
+_content_digest_memo: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+_content_digest_lock = threading.Lock()
+
 
 def new_sha256() -> "hashlib._Hash":
     return hashlib.sha256()
@@ -22,8 +30,41 @@ def update_hash_with_file_content(hasher: "hashlib._Hash", file_path: str) -> No
 
 
 def update_hash_with_file_stat(hasher: "hashlib._Hash", file_path: str) -> None:
-    if not os.path.isfile(file_path):
+    # One stat call doubles as the is-regular-file check.
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return
+    if not stat_module.S_ISREG(stat.st_mode):
         return
-    stat = os.stat(file_path)
     update_hash_with_value(hasher, stat.st_size)
     update_hash_with_value(hasher, stat.st_mtime_ns)
+
+
+def update_hash_with_file_content_memo(hasher: "hashlib._Hash", file_path: str) -> None:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return
+    if not stat_module.S_ISREG(stat.st_mode):
+        return
+
+    abs_path = os.path.abspath(file_path)
+    with _content_digest_lock:
+        memo = _content_digest_memo.get(abs_path)
+        if memo is not None and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            _content_digest_memo.move_to_end(abs_path)
+            hasher.update(memo[2])
+            return
+
+    # Size or mtime moved (or first sight): pay for a full read once and remember the digest.
+    content_hasher = new_sha256()
+    update_hash_with_file_content(content_hasher, abs_path)
+    digest = content_hasher.digest()
+
+    with _content_digest_lock:
+        _content_digest_memo[abs_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        _content_digest_memo.move_to_end(abs_path)
+        while len(_content_digest_memo) > _MAX_CONTENT_DIGEST_MEMO:
+            _content_digest_memo.popitem(last=False)
+    hasher.update(digest)
@@ -31,6 +31,15 @@ def pick_mode_items(items: Sequence[str], mode: str, index: int) -> list[str]:
     return values
 
 
+def upcoming_single_items(items: Sequence[str], index: int, depth: int) -> list[str]:
+    # The items a sequential single-mode run will ask for after this index.
+    values = list(items)
+    if depth <= 0 or not values:
+        return []
+    start = clamp_single_index(index, len(values)) + 1
+    return values[start : start + depth]
+
+
 def select_from_multiline(raw_text: str, max_items: int, mode: str, index: int) -> list[str]:
     values = apply_limit(parse_multiline_list(raw_text), max_items)
     return pick_mode_items(values, mode, index)
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import itertools
 import os
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Callable, Iterator, Sequence
 
 import folder_paths
 
+from .dir_index import DirSnapshot, directory_index
 from .list_utils import apply_limit, parse_multiline_list, pick_mode_items
+from .stat_cache import stat_cache
 
 VIDEO_EXTENSIONS = {".mp4", ".webm", ".avi", ".mov", ".mkv", ".flv", ".m4v"}
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".avif"}
 
+# VALIDATE_INPUTS, IS_CHANGED and execution resolve the same list back to back; keep results briefly.
+_RESOLVE_FRESH_SECONDS = 5.0
+_RESOLVE_MAX_AGE_SECONDS = 300.0
+_MAX_RESOLVE_MEMO = 50000
+_MIN_NAMES_FOR_DIR_LISTING = 16
+
+_resolve_memo: OrderedDict[tuple[str, str], tuple[str | None, float]] = OrderedDict()
+_resolve_lock = threading.Lock()
+
 
 @dataclass(frozen=True)
 class InputViewParams:
@@ -21,12 +37,15 @@ class InputViewParams:
 class ScannedVideoEntry:
     path: str
     preview: InputViewParams | None
+    # Absolute path of the file the scanner listed; empty when the entry did not come from a scan.
+    source_path: str = ""
 
 
 @dataclass(frozen=True)
 class ScannedImageEntry:
     path: str
     preview: InputViewParams | None
+    source_path: str = ""
 
 
 def normalize_posix_path(path: str) -> str:
@@ -86,62 +105,283 @@ def is_previewable_path(path: str) -> bool:
     return build_input_view_params(path) is not None
 
 
-def _list_media_from_server_dir(server_dir: str, allowed_extensions: set[str]) -> list[tuple[str, InputViewParams | None]]:
+def _dir_media_children(
+    dir_path: str,
+    snapshot: DirSnapshot,
+    input_dir: str,
+    allowed_extensions: frozenset[str],
+    entry_type: type,
+) -> tuple[tuple[str, object | None, str | None], ...]:
+    view_key = (input_dir, allowed_extensions, entry_type)
+    children = snapshot.derived.get(view_key)
+    if children is not None:
+        return children
+
+    # Path prefix and preview subfolder are worked out once per directory instead of once per file.
+    abs_dir = os.path.abspath(dir_path)
+    within_input = _is_within_dir(abs_dir, input_dir)
+    rel_dir = to_input_relative_or_abs(abs_dir, input_dir)
+    if rel_dir == ".":
+        rel_dir = ""
+    prefix = rel_dir if not rel_dir or rel_dir.endswith("/") else rel_dir + "/"
+
+    built: list[tuple[str, object | None, str | None]] = []
+    for file_name in snapshot.file_names:
+        if os.path.splitext(file_name)[1].lower() not in allowed_extensions:
+            continue
+        path = prefix + normalize_posix_path(file_name)
+        if not within_input:
+            preview = None
+        elif (
+            "\\" not in file_name
+            and file_name == file_name.strip()
+            and not _is_abs_like(path)
+            and not path.startswith("..")
+            and "/.." not in path
+        ):
+            preview = InputViewParams(filename=file_name, subfolder=rel_dir)
+        else:
+            preview = build_input_view_params(path, input_dir=input_dir)
+        entry = entry_type(path=path, preview=preview, source_path=os.path.join(abs_dir, file_name))
+        built.append((path, entry, None))
+
+    # A subdirectory sorts as "name/", exactly where its files fall in a sort over full paths.
+    for subdir_name in snapshot.subdir_names:
+        built.append((prefix + normalize_posix_path(subdir_name) + "/", None, subdir_name))
+
+    built.sort(key=lambda child: child[0])
+    children = tuple(built)
+    snapshot.derived[view_key] = children
+    return children
+
+
+def _walk_media_in_path_order(
+    base_dir: str,
+    input_dir: str,
+    allowed_extensions: set[str],
+    entry_type: type,
+    after: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator:
+    # Depth-first over per-directory sorted children yields entries already in path order,
+    # so callers can stop early without walking (or sorting) the rest of the tree.
+    # Unchanged directories (same mtime) are served from the index; only modified ones are listed again.
+    # Snapshots saved by an earlier process seed the index and are saved back once the walk ends.
+    # cancelled is polled once per directory, so a cancelled scan stops even while nothing matches.
+    extensions = frozenset(allowed_extensions)
+    directory_index.load_tree(base_dir)
+    try:
+        stack: list[tuple[str, Iterator]] = []
+        snapshot = directory_index.snapshot(base_dir)
+        if snapshot is not None:
+            base_children = _dir_media_children(base_dir, snapshot, input_dir, extensions, entry_type)
+            stack.append((base_dir, iter(base_children)))
+
+        while stack:
+            dir_path, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+
+            sort_key, entry, subdir_name = child
+            if after is not None and sort_key <= after and (entry is not None or not after.startswith(sort_key)):
+                # Already returned on an earlier page; whole subdirectories are skipped unvisited.
+                continue
+            if entry is not None:
+                yield entry
+                continue
+
+            if cancelled is not None and cancelled():
+                return
+            subdir_path = os.path.join(dir_path, subdir_name)
+            subdir_snapshot = directory_index.snapshot(subdir_path)
+            if subdir_snapshot is not None:
+                subdir_children = _dir_media_children(
+                    subdir_path, subdir_snapshot, input_dir, extensions, entry_type
+                )
+                stack.append((subdir_path, iter(subdir_children)))
+    finally:
+        directory_index.save_tree(base_dir)
+
+
+def _iter_media_from_server_dir(
+    server_dir: str,
+    allowed_extensions: set[str],
+    entry_type: type,
+    after: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator:
     server_dir = (server_dir or "").strip()
     if not server_dir:
-        return []
+        return
 
-    input_dir = folder_paths.get_input_directory()
+    input_dir = os.path.abspath(folder_paths.get_input_directory())
     base_dir = server_dir if os.path.isabs(server_dir) else os.path.join(input_dir, server_dir)
     if not os.path.isdir(base_dir):
-        return []
+        return
 
-    results: list[tuple[str, InputViewParams | None]] = []
-    for root, _, files in os.walk(base_dir):
-        for file_name in files:
-            ext = os.path.splitext(file_name)[1].lower()
-            if ext not in allowed_extensions:
-                continue
-            abs_path = os.path.join(root, file_name)
-            resolved_path = to_input_relative_or_abs(abs_path, input_dir)
-            preview = build_input_view_params(resolved_path, input_dir=input_dir)
-            results.append((resolved_path, preview))
+    if not _is_within_dir(base_dir, input_dir) and _is_within_dir(input_dir, base_dir):
+        # Files under the input dir come back input-relative and the rest absolute,
+        # so walk order is not path order here: list everything and sort.
+        entries = sorted(
+            _walk_media_in_path_order(base_dir, input_dir, allowed_extensions, entry_type, cancelled=cancelled),
+            key=lambda entry: entry.path,
+        )
+        yield from (entry for entry in entries if after is None or entry.path > after)
+        return
+
+    yield from _walk_media_in_path_order(base_dir, input_dir, allowed_extensions, entry_type, after, cancelled)
 
-    results.sort(key=lambda entry: entry[0])
-    return results
 
+def iter_videos_from_server_dir(
+    server_video_dir: str,
+    after: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[ScannedVideoEntry]:
+    return _iter_media_from_server_dir(server_video_dir, VIDEO_EXTENSIONS, ScannedVideoEntry, after, cancelled)
 
-def list_videos_from_server_dir(server_video_dir: str) -> list[ScannedVideoEntry]:
-    entries = _list_media_from_server_dir(server_video_dir, VIDEO_EXTENSIONS)
-    return [ScannedVideoEntry(path=path, preview=preview) for path, preview in entries]
 
+def iter_images_from_server_dir(
+    server_image_dir: str,
+    after: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[ScannedImageEntry]:
+    return _iter_media_from_server_dir(server_image_dir, IMAGE_EXTENSIONS, ScannedImageEntry, after, cancelled)
 
-def list_images_from_server_dir(server_image_dir: str) -> list[ScannedImageEntry]:
-    entries = _list_media_from_server_dir(server_image_dir, IMAGE_EXTENSIONS)
-    return [ScannedImageEntry(path=path, preview=preview) for path, preview in entries]
 
+def _take(entries: Iterator, max_items: int) -> list:
+    if max_items > 0:
+        return list(itertools.islice(entries, max_items))
+    return list(entries)
 
-def resolve_image_path(name: str) -> str | None:
-    if not name:
-        return None
 
-    clean_name = name.strip()
-    if not clean_name:
+def list_videos_from_server_dir(server_video_dir: str, max_items: int = 0) -> list[ScannedVideoEntry]:
+    return _take(iter_videos_from_server_dir(server_video_dir), max_items)
+
+
+def list_images_from_server_dir(server_image_dir: str, max_items: int = 0) -> list[ScannedImageEntry]:
+    return _take(iter_images_from_server_dir(server_image_dir), max_items)
+
+
+def _is_annotated_name(name: str) -> bool:
+    # "name [input]" / "[output]" / "[temp]" style names are left to folder_paths.
+    return name.endswith("]")
+
+
+def _list_dir_entries(dir_path: str) -> dict[str, bool] | None:
+    try:
+        with os.scandir(dir_path) as iterator:
+            return {entry.name: entry.is_file() for entry in iterator}
+    except OSError:
         return None
 
-    if folder_paths.exists_annotated_filepath(clean_name):
-        return folder_paths.get_annotated_filepath(clean_name)
 
-    if os.path.isfile(clean_name):
+def _path_is_file(path: str, listings: dict[str, dict[str, bool] | None]) -> bool:
+    entries = listings.get(os.path.dirname(path))
+    if entries is None:
+        entries = listings.get(os.path.dirname(os.path.abspath(path)))
+    if entries is not None and entries.get(os.path.basename(path)):
+        return True
+    # Misses still stat, so case-insensitive filesystems resolve exactly as before. The shared cache
+    # answers for files a scan or preview just statted.
+    return stat_cache.isfile(path)
+
+
+def _resolve_uncached(
+    clean_name: str,
+    input_dir: str,
+    listings: dict[str, dict[str, bool] | None],
+) -> str | None:
+    if _is_annotated_name(clean_name):
+        if folder_paths.exists_annotated_filepath(clean_name):
+            return folder_paths.get_annotated_filepath(clean_name)
+    else:
+        # Same candidate folder_paths.get_annotated_filepath builds for un-annotated names.
+        annotated_candidate = os.path.join(input_dir, clean_name)
+        # Files only: a directory with a media name is not something the loaders can decode.
+        if _path_is_file(annotated_candidate, listings):
+            return annotated_candidate
+
+    if _path_is_file(clean_name, listings):
         return clean_name
 
-    candidate = os.path.join(folder_paths.get_input_directory(), clean_name)
-    if os.path.isfile(candidate):
+    candidate = os.path.join(input_dir, clean_name)
+    if _path_is_file(candidate, listings):
         return candidate
 
     return None
 
 
+def _memo_lookup(key: tuple[str, str], now: float) -> tuple[bool, str | None]:
+    with _resolve_lock:
+        memo = _resolve_memo.get(key)
+    if memo is None:
+        return False, None
+
+    resolved, checked_at = memo
+    age = now - checked_at
+    if age < _RESOLVE_FRESH_SECONDS:
+        return True, resolved
+    # Older hits are re-validated with a single stat instead of the full resolution chain.
+    if resolved is not None and age < _RESOLVE_MAX_AGE_SECONDS and os.path.isfile(resolved):
+        return True, resolved
+    return False, None
+
+
+def _memo_store(key: tuple[str, str], resolved: str | None, now: float) -> None:
+    with _resolve_lock:
+        _resolve_memo[key] = (resolved, now)
+        _resolve_memo.move_to_end(key)
+        while len(_resolve_memo) > _MAX_RESOLVE_MEMO:
+            _resolve_memo.popitem(last=False)
+
+
+def resolve_media_paths(names: Sequence[str]) -> list[str | None]:
+    input_dir = folder_paths.get_input_directory()
+    now = time.monotonic()
+    results: list[str | None] = [None] * len(names)
+    pending: list[tuple[int, str]] = []
+
+    for position, name in enumerate(names):
+        clean_name = (name or "").strip()
+        if not clean_name:
+            continue
+        hit, resolved = _memo_lookup((clean_name, input_dir), now)
+        if hit:
+            results[position] = resolved
+        else:
+            pending.append((position, clean_name))
+
+    # List each crowded parent directory once instead of stat-ing every entry in it.
+    dir_counts: dict[str, int] = {}
+    for _, clean_name in pending:
+        if not _is_annotated_name(clean_name):
+            parent = os.path.dirname(os.path.join(input_dir, clean_name))
+            dir_counts[parent] = dir_counts.get(parent, 0) + 1
+    listings = {
+        parent: _list_dir_entries(parent)
+        for parent, count in dir_counts.items()
+        if count >= _MIN_NAMES_FOR_DIR_LISTING
+    }
+
+    for position, clean_name in pending:
+        resolved = _resolve_uncached(clean_name, input_dir, listings)
+        _memo_store((clean_name, input_dir), resolved, now)
+        results[position] = resolved
+    return results
+
+
+def _resolve_media_path(name: str) -> str | None:
+    if not name or not name.strip():
+        return None
+    return resolve_media_paths([name])[0]
+
+
+def resolve_image_path(name: str) -> str | None:
+    return _resolve_media_path(name)
+
+
 def list_video_candidates(video_list: str, max_videos: int, server_video_dir: str) -> list[str]:
     # Task creation/execution must come from explicit video_list entries.
     # server_video_dir is reserved for scan helpers that populate video_list.
@@ -161,21 +401,4 @@ def select_video_names(
 
 
 def resolve_video_path(name: str) -> str | None:
-    if not name:
-        return None
-
-    clean_name = name.strip()
-    if not clean_name:
-        return None
-
-    if folder_paths.exists_annotated_filepath(clean_name):
-        return folder_paths.get_annotated_filepath(clean_name)
-
-    if os.path.isfile(clean_name):
-        return clean_name
-
-    candidate = os.path.join(folder_paths.get_input_directory(), clean_name)
-    if os.path.isfile(candidate):
-        return candidate
-
-    return None
+    return _resolve_media_path(name)
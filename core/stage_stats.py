@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from .env_utils import read_env_int
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+_MAX_RECENT_EXECUTIONS = 32
+# Upper bounds of the latency histogram buckets in milliseconds; one extra bucket takes the rest.
+_HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0, 5000.0)
+
+logger = logging.getLogger(__name__)
+
+
+class StageTotals:
+    __slots__ = ("count", "seconds", "max_seconds", "nbytes", "histogram")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.nbytes = 0
+        self.histogram = [0] * (len(_HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float, nbytes: int) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.nbytes += nbytes
+        self.histogram[bisect_left(_HISTOGRAM_BOUNDS_MS, seconds * 1000.0)] += 1
+
+    def merge(self, other: StageTotals) -> None:
+        self.count += other.count
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.nbytes += other.nbytes
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+
+    def to_payload(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.seconds * 1000.0, 3),
+            "mean_ms": round(self.seconds * 1000.0 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000.0, 3),
+            "bytes": self.nbytes,
+            "histogram": self.histogram,
+        }
+
+
+class ExecutionStats:
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self._started_perf = time.perf_counter()
+        self.stages: dict[str, StageTotals] = {}
+        self.counters: dict[str, int] = {}
+        # Worker threads of one execution report into the same record.
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, seconds: float, nbytes: int) -> None:
+        with self._lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = StageTotals()
+            totals.add(seconds, nbytes)
+
+    def add_count(self, name: str, amount: int) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self) -> None:
+        self.wall_seconds = time.perf_counter() - self._started_perf
+
+    def to_payload(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "started_at": self.started_at,
+                "wall_ms": round(self.wall_seconds * 1000.0, 3),
+                "stages": {name: totals.to_payload() for name, totals in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def summary(self) -> str:
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1].seconds, reverse=True)
+            parts = [f"{name}={totals.seconds * 1000.0:.1f}ms/{totals.count}" for name, totals in stages]
+            parts.extend(f"{name}={count}" for name, count in sorted(self.counters.items()))
+        return f"{self.kind} {self.wall_seconds * 1000.0:.1f}ms " + " ".join(parts)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullStage:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def add_bytes(self, nbytes: int) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("_record", "_name", "_started", "_nbytes")
+
+    def __init__(self, record: ExecutionStats, name: str) -> None:
+        self._record = record
+        self._name = name
+        self._started = 0.0
+        self._nbytes = 0
+
+    def __enter__(self) -> _Stage:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._record.add_stage(self._name, time.perf_counter() - self._started, self._nbytes)
+
+    def add_bytes(self, nbytes: int) -> None:
+        self._nbytes += int(nbytes)
+
+
+class _ThreadRecord(threading.local):
+    # Class-level default: threads that never opened an execution read None without an AttributeError.
+    record: ExecutionStats | None = None
+
+
+class _ExecutionScope:
+    __slots__ = ("_stats", "_record")
+
+    def __init__(self, stats: StageStats, record: ExecutionStats) -> None:
+        self._stats = stats
+        self._record = record
+
+    def __enter__(self) -> ExecutionStats:
+        self._stats._local.record = self._record
+        return self._record
+
+    def __exit__(self, *exc_info) -> None:
+        self._stats._local.record = None
+        self._record.finish()
+        self._stats._finish(self._record)
+
+
+class StageStats:
+    def __init__(self, enabled: bool, log_executions: bool) -> None:
+        self._enabled = bool(enabled)
+        self._log_executions = bool(log_executions)
+        self._local = _ThreadRecord()
+        self._recent: deque[ExecutionStats] = deque(maxlen=_MAX_RECENT_EXECUTIONS)
+        self._totals: dict[str, dict[str, StageTotals]] = {}
+        self._executions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        self._enabled = bool(enabled)
+
+    def current(self) -> ExecutionStats | None:
+        return self._local.record
+
+    def execution(self, kind: str) -> _ExecutionScope | _NullStage:
+        # Nested calls (a node calling a traced service) report into the outer execution.
+        if not self._enabled or self.current() is not None:
+            return _NULL_STAGE
+        return _ExecutionScope(self, ExecutionStats(kind))
+
+    def track_execution(self, kind: str) -> Callable[[Callable[..., _R]], Callable[..., _R]]:
+        def decorate(func: Callable[..., _R]) -> Callable[..., _R]:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> _R:
+                with self.execution(kind):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def stage(self, name: str) -> _Stage | _NullStage:
+        record = self._local.record
+        if record is None:
+            return _NULL_STAGE
+        return _Stage(record, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        record = self._local.record
+        if record is not None:
+            record.add_count(name, amount)
+
+    def timed_iter(self, name: str, items: Iterable[_T]) -> Iterator[_T]:
+        record = self._local.record
+        if record is None:
+            return iter(items)
+        return self._timed_iter(record, name, iter(items))
+
+    @staticmethod
+    def _timed_iter(record: ExecutionStats, name: str, iterator: Iterator[_T]) -> Iterator[_T]:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            record.add_stage(name, time.perf_counter() - started, 0)
+            yield item
+
+    def bind(self, func: Callable[..., _R]) -> Callable[..., _R]:
+        # Carries the calling thread's execution into work handed to pool threads.
+        record = self._local.record
+        if record is None:
+            return func
+
+        @functools.wraps(func)
+        def bound(*args, **kwargs) -> _R:
+            previous = self._local.record
+            self._local.record = record
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.record = previous
+
+        return bound
+
+    def _finish(self, record: ExecutionStats) -> None:
+        with self._lock:
+            self._recent.append(record)
+            self._executions[record.kind] = self._executions.get(record.kind, 0) + 1
+            kind_totals = self._totals.setdefault(record.kind, {})
+            for name, totals in record.stages.items():
+                kind_totals.setdefault(name, StageTotals()).merge(totals)
+        if self._log_executions:
+            logger.info("[gugu-batch] %s", record.summary())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+            totals = {
+                kind: {
+                    "executions": self._executions.get(kind, 0),
+                    "stages": {name: stage.to_payload() for name, stage in stages.items()},
+                }
+                for kind, stages in self._totals.items()
+            }
+        return {
+            "enabled": self._enabled,
+            "histogram_bounds_ms": list(_HISTOGRAM_BOUNDS_MS),
+            "totals": totals,
+            "recent": [record.to_payload() for record in reversed(recent)],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._totals.clear()
+            self._executions.clear()
+
+
+_log_stats = read_env_int("GUGU_BATCH_STATS_LOG", 0) > 0
+stage_stats = StageStats(enabled=read_env_int("GUGU_BATCH_STATS", 0) > 0 or _log_stats, log_executions=_log_stats)
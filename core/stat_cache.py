@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import stat as stat_module
+import threading
+import time
+from collections import OrderedDict
+
+# Scans, preview tokens and metadata requests stat the same files within seconds of each other.
+_STAT_TTL_SECONDS = 10.0
+_MAX_STAT_ENTRIES = 200000
+
+
+class StatCache:
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self._ttl_seconds = float(ttl_seconds)
+        self._max_entries = max(int(max_entries), 1)
+        self._entries: OrderedDict[str, tuple[os.stat_result | None, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stat(self, path: str) -> os.stat_result | None:
+        abs_path = os.path.abspath(path)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(abs_path)
+            if cached is not None and now - cached[1] < self._ttl_seconds:
+                return cached[0]
+
+        try:
+            result = os.stat(abs_path)
+        except OSError:
+            result = None
+
+        with self._lock:
+            self._entries[abs_path] = (result, now)
+            self._entries.move_to_end(abs_path)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def isfile(self, path: str) -> bool:
+        result = self.stat(path)
+        return result is not None and stat_module.S_ISREG(result.st_mode)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+stat_cache = StatCache(_STAT_TTL_SECONDS, _MAX_STAT_ENTRIES)
@@ -1,19 +1,48 @@
 from __future__ import annotations
 
-import os
-
-import torch
+import numpy as np
 
 from ..core import (
     apply_limit,
     new_sha256,
     parse_multiline_list,
-    resolve_image_path,
+    resolve_media_paths,
     select_from_multiline,
+    stage_stats,
     update_hash_with_file_content,
+    update_hash_with_file_content_memo,
+    update_hash_with_file_stat,
     update_hash_with_value,
+    upcoming_single_items,
+)
+from ..services import (
+    MAX_PREFETCH_DEPTH,
+    FrameBatchBuilder,
+    estimate_image_frame_count,
+    imap_ordered,
+    load_image_array,
+    schedule_image_prefetch,
+    take_prefetched_image,
 )
-from ..services import load_image_tensor
+
+# stat: size + mtime only; content_memo: full hash, reused while size/mtime are unchanged; content: always rehash.
+_CHANGE_DETECTION_HASHERS = {
+    "stat": update_hash_with_file_stat,
+    "content_memo": update_hash_with_file_content_memo,
+    "content": update_hash_with_file_content,
+}
+
+
+def _estimate_image_path(image_path: str | None, max_edge: int = 0) -> int:
+    if not image_path:
+        return 0
+    return estimate_image_frame_count(image_path, max_edge)
+
+
+def _decode_image_path(image_path: str | None, max_edge: int = 0) -> np.ndarray | None:
+    if not image_path:
+        return None
+    return load_image_array(image_path, max_edge=max_edge)
 
 
 class GuguBatchLoadImages:
@@ -26,7 +55,17 @@ class GuguBatchLoadImages:
                 "mode": (["batch", "single"], {"default": "batch"}),
                 "index": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
                 "server_image_dir": ("STRING", {"default": ""}),
-            }
+            },
+            "optional": {
+                # 1 keeps the sequential path, 0 picks one worker per CPU core.
+                "decode_workers": ("INT", {"default": 1, "min": 0, "max": 64, "step": 1}),
+                "change_detection": (list(_CHANGE_DETECTION_HASHERS), {"default": "stat"}),
+                # >0 shrinks images during decode so their longest edge is at most max_edge pixels.
+                "max_edge": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1}),
+                # single mode: decode the next prefetch_depth items in the background for the next prompts.
+                # Off by default: untaken results stay in memory until evicted.
+                "prefetch_depth": ("INT", {"default": 0, "min": 0, "max": MAX_PREFETCH_DEPTH, "step": 1}),
+            },
         }
 
     CATEGORY = "gugu/utools/IO"
@@ -34,6 +73,7 @@ class GuguBatchLoadImages:
     RETURN_NAMES = ("images", "filenames", "failed_filenames")
     FUNCTION = "load_images"
 
+    @stage_stats.track_execution("GuguBatchLoadImages")
     def load_images(
         self,
         image_list: str,
@@ -41,33 +81,61 @@ class GuguBatchLoadImages:
         mode: str,
         index: int,
         server_image_dir: str = "",
+        decode_workers: int = 1,
+        change_detection: str = "stat",
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         names = select_from_multiline(image_list, max_images, mode, index)
         if not names:
             raise ValueError("image_list is empty")
 
-        output_images: list[torch.Tensor] = []
+        # Resolved in one pass; repeats within a few seconds of IS_CHANGED/VALIDATE_INPUTS are memo hits.
+        with stage_stats.stage("resolve_paths"):
+            image_paths = resolve_media_paths(names)
+
+        def decode(image_path: str | None) -> np.ndarray | None:
+            return _decode_image_path(image_path, max_edge)
+
+        def estimate(image_path: str | None) -> int:
+            return _estimate_image_path(image_path, max_edge)
+
+        prefetch = mode == "single" and prefetch_depth > 0
+        prefetched = take_prefetched_image(image_paths[0], max_edge) if prefetch else None
+        if prefetched is not None:
+            capacity_hint = int(prefetched.shape[0])
+            decoded = iter([prefetched])
+        else:
+            # Header-only probe (or cached frame count) so decoded pixels land in one preallocated tensor.
+            with stage_stats.stage("probe"):
+                capacity_hint = sum(imap_ordered(estimate, image_paths, decode_workers))
+            decoded = imap_ordered(decode, image_paths, decode_workers)
+        output_images = FrameBatchBuilder(capacity_hint)
         output_names: list[str] = []
         failed_names: list[str] = []
 
-        for name in names:
-            image_path = resolve_image_path(name)
-            if not image_path:
+        # Workers hand back uint8 frames; the float conversion writes straight into the output.
+        for name, frames in zip(names, decoded):
+            if frames is None:
                 failed_names.append(name)
                 continue
 
-            tensor = load_image_tensor(image_path)
-            if tensor is None:
-                failed_names.append(name)
-                continue
-
-            output_images.append(tensor)
+            output_images.extend_uint8(frames)
             output_names.append(name)
 
-        if not output_images:
+        output_tensor = output_images.build()
+        stage_stats.count("items_loaded", len(output_names))
+        stage_stats.count("items_failed", len(failed_names))
+
+        if prefetch:
+            # Decoded in the background while the rest of this prompt (and the queue) runs.
+            values = apply_limit(parse_multiline_list(image_list), max_images)
+            upcoming = upcoming_single_items(values, index, prefetch_depth)
+            schedule_image_prefetch(resolve_media_paths(upcoming), max_edge)
+
+        if output_tensor is None:
             raise ValueError("No valid images found")
 
-        output_tensor = torch.cat(output_images, dim=0)
         return (output_tensor, "\n".join(output_names), "\n".join(failed_names))
 
     @classmethod
@@ -78,6 +146,10 @@ class GuguBatchLoadImages:
         mode: str,
         index: int,
         server_image_dir: str = "",
+        decode_workers: int = 1,
+        change_detection: str = "stat",
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         hasher = new_sha256()
         names = select_from_multiline(image_list, max_images, mode, index)
@@ -86,12 +158,14 @@ class GuguBatchLoadImages:
         update_hash_with_value(hasher, index)
         update_hash_with_value(hasher, max_images)
         update_hash_with_value(hasher, server_image_dir or "")
+        update_hash_with_value(hasher, change_detection)
+        update_hash_with_value(hasher, max_edge)
 
-        for name in names:
+        update_hash_with_file = _CHANGE_DETECTION_HASHERS.get(change_detection, update_hash_with_file_stat)
+        for name, image_path in zip(names, resolve_media_paths(names)):
             update_hash_with_value(hasher, name)
-            image_path = resolve_image_path(name)
-            if image_path and os.path.isfile(image_path):
-                update_hash_with_file_content(hasher, image_path)
+            if image_path:
+                update_hash_with_file(hasher, image_path)
 
         return hasher.digest().hex()
 
@@ -103,6 +177,10 @@ class GuguBatchLoadImages:
         mode: str,
         index: int,
         server_image_dir: str = "",
+        decode_workers: int = 1,
+        change_detection: str = "stat",
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         names = apply_limit(parse_multiline_list(image_list), max_images)
 
@@ -117,7 +195,16 @@ class GuguBatchLoadImages:
         if not names:
             return "image_list is empty"
 
-        if not any(resolve_image_path(name) for name in names):
+        if decode_workers < 0:
+            return "decode_workers must be >= 0"
+        if change_detection not in _CHANGE_DETECTION_HASHERS:
+            return f"change_detection must be one of {', '.join(_CHANGE_DETECTION_HASHERS)}"
+        if max_edge < 0:
+            return "max_edge must be >= 0"
+        if prefetch_depth < 0:
+            return "prefetch_depth must be >= 0"
+
+        if not any(resolve_media_paths(names)):
             return "No valid images in image_list"
 
         return True
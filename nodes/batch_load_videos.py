@@ -2,17 +2,49 @@ from __future__ import annotations
 
 import os
 
-import torch
-
 from ..core import (
     list_video_candidates,
     new_sha256,
-    resolve_video_path,
+    resolve_media_paths,
     select_video_names,
+    stage_stats,
     update_hash_with_file_stat,
     update_hash_with_value,
+    upcoming_single_items,
+)
+from ..services import (
+    MAX_PREFETCH_DEPTH,
+    FrameBatchBuilder,
+    RawFrameCollector,
+    VideoDecodeResult,
+    decode_video_chunk,
+    estimate_video_frame_count,
+    imap_ordered,
+    load_video_frames,
+    resolve_worker_count,
+    schedule_video_prefetch,
+    take_prefetched_video,
 )
-from ..services import decode_video_frames
+
+
+def _decode_video(
+    video_path: str | None,
+    expected_hw: tuple[int, int] | None,
+    output: FrameBatchBuilder | RawFrameCollector,
+    **decode_options,
+) -> VideoDecodeResult | None:
+    if not video_path:
+        return None
+
+    frame_start = output.count
+    try:
+        return load_video_frames(video_path=video_path, expected_hw=expected_hw, output=output, **decode_options)
+    except ImportError:
+        raise
+    except Exception:
+        if isinstance(output, FrameBatchBuilder):
+            output.truncate(frame_start)
+        return None
 
 
 class GuguBatchLoadVideos:
@@ -28,7 +60,24 @@ class GuguBatchLoadVideos:
                 "frame_load_cap": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 1}),
                 "select_every_nth": ("INT", {"default": 1, "min": 1, "max": 1000, "step": 1}),
                 "server_video_dir": ("STRING", {"default": ""}),
-            }
+            },
+            "optional": {
+                # Jump to the keyframe before skip_frames instead of decoding every skipped frame.
+                "fast_seek": ("BOOLEAN", {"default": False}),
+                # Trade frame-exact select_every_nth for skipping non-reference frames during decode.
+                "approximate_sampling": ("BOOLEAN", {"default": False}),
+                # 1 keeps the sequential path, 0 picks one worker per CPU core.
+                "decode_workers": ("INT", {"default": 1, "min": 0, "max": 64, "step": 1}),
+                # >0 emits the selected frames of all listed videos as windows of chunk_size frames;
+                # chunk_index picks the window, so successive queues walk a long input in bounded memory.
+                "chunk_size": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
+                "chunk_index": ("INT", {"default": 0, "min": 0, "max": 10000000, "step": 1}),
+                # >0 shrinks frames during decode so their longest edge is at most max_edge pixels.
+                "max_edge": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1}),
+                # single mode without chunking: decode the next prefetch_depth videos in the background.
+                # Off by default: untaken results stay in memory until evicted.
+                "prefetch_depth": ("INT", {"default": 0, "min": 0, "max": MAX_PREFETCH_DEPTH, "step": 1}),
+            },
         }
 
     CATEGORY = "gugu/utools/IO"
@@ -36,6 +85,7 @@ class GuguBatchLoadVideos:
     RETURN_NAMES = ("images", "fps", "filenames", "failed_filenames")
     FUNCTION = "load_videos"
 
+    @stage_stats.track_execution("GuguBatchLoadVideos")
     def load_videos(
         self,
         video_list: str,
@@ -46,51 +96,125 @@ class GuguBatchLoadVideos:
         frame_load_cap: int,
         select_every_nth: int,
         server_video_dir: str = "",
+        fast_seek: bool = False,
+        approximate_sampling: bool = False,
+        decode_workers: int = 1,
+        chunk_size: int = 0,
+        chunk_index: int = 0,
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         names = select_video_names(video_list, max_videos, mode, index, server_video_dir)
         if not names:
             raise ValueError("video_list is empty")
 
-        output_frames: list[torch.Tensor] = []
+        with stage_stats.stage("resolve_paths"):
+            video_paths = resolve_media_paths(names)
+        decode_options = {
+            "skip_frames": skip_frames,
+            "frame_load_cap": frame_load_cap,
+            "select_every_nth": select_every_nth,
+            "fast_seek": fast_seek,
+            "approximate_sampling": approximate_sampling,
+            "max_edge": max_edge,
+        }
+
+        if chunk_size > 0:
+            output_frames = FrameBatchBuilder(chunk_size)
+            chunk = decode_video_chunk(
+                list(zip(names, video_paths)), chunk_size, chunk_index, output_frames, decode_options
+            )
+            output_tensor = output_frames.build()
+            stage_stats.count("items_loaded", len(chunk.output_names))
+            stage_stats.count("items_failed", len(chunk.failed_names))
+            if output_tensor is None:
+                raise ValueError(f"No video frames left for chunk_index {chunk_index}")
+
+            fps_values = chunk.fps_values
+            avg_fps = float(sum(fps_values) / len(fps_values)) if fps_values else 0.0
+            return (output_tensor, avg_fps, "\n".join(chunk.output_names), "\n".join(chunk.failed_names))
+
+        def estimate(video_path: str | None) -> int:
+            if not video_path:
+                return 0
+            return estimate_video_frame_count(video_path, skip_frames, frame_load_cap, select_every_nth)
+
+        with stage_stats.stage("probe"):
+            capacity_hint = sum(imap_ordered(estimate, video_paths, decode_workers))
+
+        output_frames = FrameBatchBuilder(capacity_hint)
         output_names: list[str] = []
         failed_names: list[str] = []
         fps_values: list[float] = []
         expected_hw: tuple[int, int] | None = None
 
-        for name in names:
-            video_path = resolve_video_path(name)
-            if not video_path:
-                failed_names.append(name)
-                continue
-
-            try:
-                decode_result = decode_video_frames(
-                    video_path=video_path,
-                    skip_frames=skip_frames,
-                    frame_load_cap=frame_load_cap,
-                    select_every_nth=select_every_nth,
-                    expected_hw=expected_hw,
-                )
-            except ImportError:
-                raise
-            except Exception:
+        def record(name: str, decode_result: VideoDecodeResult | None) -> bool:
+            if decode_result is None:
                 failed_names.append(name)
-                continue
-
-            expected_hw = decode_result.expected_hw
+                return False
             if decode_result.fps > 0:
                 fps_values.append(decode_result.fps)
-            if not decode_result.frames:
+            if decode_result.frame_count == 0:
                 failed_names.append(name)
-                continue
-
-            output_frames.extend(decode_result.frames)
+                return False
             output_names.append(name)
+            return True
+
+        entries = list(zip(names, video_paths))
+        worker_count = resolve_worker_count(decode_workers, len(entries))
+        position = 0
+
+        prefetch = mode == "single" and prefetch_depth > 0
+        prefetched = take_prefetched_video(video_paths[0], decode_options) if prefetch else None
+        if prefetched is not None:
+            decode_result, collector = prefetched
+            collector.drain_into(output_frames)
+            expected_hw = decode_result.expected_hw
+            record(names[0], decode_result)
+            position = 1
+
+        # The first video that yields a frame fixes the output size, so decode in order until then.
+        while position < len(entries) and (expected_hw is None or worker_count <= 1):
+            name, video_path = entries[position]
+            position += 1
+            decode_result = _decode_video(video_path, expected_hw, output_frames, **decode_options)
+            if decode_result is not None:
+                expected_hw = decode_result.expected_hw
+            record(name, decode_result)
+
+        remaining = entries[position:]
+        if remaining:
+            worker_count = resolve_worker_count(decode_workers, len(remaining))
+            # Split the cores between concurrent decoders instead of oversubscribing FFmpeg threads.
+            codec_threads = max((os.cpu_count() or 1) // worker_count, 1)
+
+            def decode_collected(entry: tuple[str, str | None]):
+                collector = RawFrameCollector()
+                decode_result = _decode_video(
+                    entry[1], expected_hw, collector, codec_threads=codec_threads, **decode_options
+                )
+                return decode_result, collector
+
+            for (name, _), (decode_result, collector) in zip(
+                remaining, imap_ordered(decode_collected, remaining, worker_count)
+            ):
+                if record(name, decode_result):
+                    collector.drain_into(output_frames)
+
+        output_tensor = output_frames.build()
+        stage_stats.count("items_loaded", len(output_names))
+        stage_stats.count("items_failed", len(failed_names))
+
+        if prefetch:
+            # Decoded in the background while the rest of this prompt (and the queue) runs.
+            upcoming = upcoming_single_items(
+                list_video_candidates(video_list, max_videos, server_video_dir), index, prefetch_depth
+            )
+            schedule_video_prefetch(resolve_media_paths(upcoming), decode_options)
 
-        if not output_frames:
+        if output_tensor is None:
             raise ValueError("No valid video frames found")
 
-        output_tensor = torch.cat(output_frames, dim=0)
         avg_fps = float(sum(fps_values) / len(fps_values)) if fps_values else 0.0
         return (output_tensor, avg_fps, "\n".join(output_names), "\n".join(failed_names))
 
@@ -105,6 +229,13 @@ class GuguBatchLoadVideos:
         frame_load_cap: int,
         select_every_nth: int,
         server_video_dir: str = "",
+        fast_seek: bool = False,
+        approximate_sampling: bool = False,
+        decode_workers: int = 1,
+        chunk_size: int = 0,
+        chunk_index: int = 0,
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         hasher = new_sha256()
         names = select_video_names(video_list, max_videos, mode, index, server_video_dir)
@@ -116,11 +247,15 @@ class GuguBatchLoadVideos:
         update_hash_with_value(hasher, frame_load_cap)
         update_hash_with_value(hasher, select_every_nth)
         update_hash_with_value(hasher, server_video_dir or "")
+        update_hash_with_value(hasher, bool(fast_seek))
+        update_hash_with_value(hasher, bool(approximate_sampling))
+        update_hash_with_value(hasher, chunk_size)
+        update_hash_with_value(hasher, chunk_index)
+        update_hash_with_value(hasher, max_edge)
 
-        for name in names:
+        for name, video_path in zip(names, resolve_media_paths(names)):
             update_hash_with_value(hasher, name)
-            video_path = resolve_video_path(name)
-            if video_path and os.path.isfile(video_path):
+            if video_path:
                 update_hash_with_file_stat(hasher, video_path)
 
         return hasher.digest().hex()
@@ -136,6 +271,13 @@ class GuguBatchLoadVideos:
         frame_load_cap: int,
         select_every_nth: int,
         server_video_dir: str = "",
+        fast_seek: bool = False,
+        approximate_sampling: bool = False,
+        decode_workers: int = 1,
+        chunk_size: int = 0,
+        chunk_index: int = 0,
+        max_edge: int = 0,
+        prefetch_depth: int = 0,
     ):
         base_names = list_video_candidates(video_list, max_videos, server_video_dir)
         if not base_names:
@@ -156,8 +298,18 @@ class GuguBatchLoadVideos:
             return "skip_frames must be >= 0"
         if frame_load_cap < 0:
             return "frame_load_cap must be >= 0"
+        if decode_workers < 0:
+            return "decode_workers must be >= 0"
+        if chunk_size < 0:
+            return "chunk_size must be >= 0"
+        if chunk_index < 0:
+            return "chunk_index must be >= 0"
+        if max_edge < 0:
+            return "max_edge must be >= 0"
+        if prefetch_depth < 0:
+            return "prefetch_depth must be >= 0"
 
-        if not any(resolve_video_path(name) for name in names):
+        if not any(resolve_media_paths(names)):
             return "No valid videos in video_list"
 
         return True
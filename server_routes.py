@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from email.utils import formatdate
 
-from aiohttp import web
+from aiohttp import hdrs, web
 from server import PromptServer
 
-from .core import resolve_image_path, resolve_video_path
-from .services import build_image_scan_payload, build_video_scan_payload, resolve_preview_file
+from .core import read_env_int, resolve_media_paths, stage_stats
+from .services import (
+    DEFAULT_THUMBNAIL_EDGE,
+    SCAN_KINDS,
+    ScanProgress,
+    cancel_scan_job,
+    clamp_thumbnail_edge,
+    get_scan_job,
+    register_preview_files,
+    resolve_preview_file,
+    start_scan_job,
+    submit_media_metadata,
+    submit_media_probes,
+    submit_scan,
+    submit_thumbnail,
+    thumbnail_spec,
+)
+
+
+# Tokens map 1:1 to files and responses carry validators, so previews can be cached for a while.
+_PREVIEW_CACHE_CONTROL = f"private, max-age={max(read_env_int('GUGU_BATCH_PREVIEW_MAX_AGE', 3600), 0)}"
 
 
 def _parse_non_negative_int(value: object, default: int = 0) -> int:
@@ -17,6 +38,22 @@ def _parse_non_negative_int(value: object, default: int = 0) -> int:
     return parsed if parsed >= 0 else 0
 
 
+async def _run_scan(kind: str, server_dir: str, max_items: int, payload: dict) -> web.Response:
+    page_size = _parse_non_negative_int(payload.get("page_size", 0))
+    cursor = str(payload.get("cursor") or "").strip()
+
+    progress = ScanProgress()
+    try:
+        result = await asyncio.wrap_future(submit_scan(kind, server_dir, max_items, progress, page_size, cursor))
+        return web.json_response(result)
+    except ValueError as exc:
+        return web.json_response({"ok": False, "error": str(exc), "items": []}, status=400)
+    except asyncio.CancelledError:
+        # The client went away; stop walking instead of finishing the scan for nobody.
+        progress.cancel()
+        raise
+
+
 @PromptServer.instance.routes.post("/mogu_batch_process/scan_video_dir")
 async def scan_video_dir(request):
     try:
@@ -33,7 +70,7 @@ async def scan_video_dir(request):
 
     max_videos = _parse_non_negative_int(payload.get("max_videos", 0))
 
-    return web.json_response(build_video_scan_payload(server_video_dir, max_videos))
+    return await _run_scan("video", server_video_dir, max_videos, payload)
 
 
 @PromptServer.instance.routes.post("/mogu_batch_process/scan_image_dir")
@@ -52,7 +89,107 @@ async def scan_image_dir(request):
 
     max_images = _parse_non_negative_int(payload.get("max_images", 0))
 
-    return web.json_response(build_image_scan_payload(server_image_dir, max_images))
+    return await _run_scan("image", server_image_dir, max_images, payload)
+
+
+@PromptServer.instance.routes.post("/mogu_batch_process/scan_job/start")
+async def start_scan_job_route(request):
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
+
+    kind = str(payload.get("kind") or "").strip()
+    if kind not in SCAN_KINDS:
+        return web.json_response(
+            {"ok": False, "error": f"kind must be one of {', '.join(SCAN_KINDS)}"},
+            status=400,
+        )
+
+    server_dir = str(payload.get("server_dir") or "").strip()
+    if not server_dir:
+        return web.json_response({"ok": False, "error": "server_dir is required"}, status=400)
+
+    max_items = _parse_non_negative_int(payload.get("max_items", 0))
+
+    job = start_scan_job(kind, server_dir, max_items)
+    return web.json_response(job.to_payload())
+
+
+@PromptServer.instance.routes.get("/mogu_batch_process/scan_job")
+async def get_scan_job_route(request):
+    job = get_scan_job(str(request.rel_url.query.get("id") or ""))
+    if job is None:
+        return web.json_response({"ok": False, "error": "scan job not found"}, status=404)
+    return web.json_response(job.to_payload())
+
+
+@PromptServer.instance.routes.post("/mogu_batch_process/scan_job/cancel")
+async def cancel_scan_job_route(request):
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
+
+    job = cancel_scan_job(str(payload.get("job_id") or ""))
+    if job is None:
+        return web.json_response({"ok": False, "error": "scan job not found"}, status=404)
+    return web.json_response(job.to_payload())
+
+
+@PromptServer.instance.routes.post("/mogu_batch_process/register_previews")
+async def register_previews(request):
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
+
+    filenames = payload.get("filenames", [])
+    if not isinstance(filenames, list):
+        filenames = []
+    names = [name for name in filenames if isinstance(name, str) and name]
+
+    def register() -> dict[str, dict[str, str]]:
+        file_paths = resolve_media_paths(names)
+        proxy_ids = register_preview_files([file_path or "" for file_path in file_paths])
+        return {name: {"proxy_id": proxy_id} for name, proxy_id in zip(names, proxy_ids) if proxy_id}
+
+    previews = await asyncio.get_running_loop().run_in_executor(None, register)
+    return web.json_response({"ok": True, "previews": previews})
+
+
+def _is_not_modified(request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or f'"{etag}"' in candidates
+    if_modified_since = request.if_modified_since
+    return if_modified_since is not None and int(last_modified) <= if_modified_since.timestamp()
+
+
+class _PreviewFileResponse(web.FileResponse):
+    # FileResponse only evaluates the HTTP-date form of If-Range and treats an entity tag as absent,
+    # which would answer a stale tag with a partial body of the new file. A tag that does not match the
+    # file's current ETag gets the full file as a 200 instead.
+    def __init__(self, path: str, **kwargs) -> None:
+        super().__init__(path, **kwargs)
+        self._preview_path = path
+
+    async def prepare(self, request):
+        if_range = request.headers.get(hdrs.IF_RANGE, "").strip()
+        if hdrs.RANGE in request.headers and if_range.startswith(('"', "W/")):
+            try:
+                stat = await asyncio.get_running_loop().run_in_executor(None, os.stat, self._preview_path)
+                etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            except OSError:
+                etag = None
+            # Strong comparison: a weak tag never matches, as If-Range requires.
+            if if_range != etag:
+                headers = request.headers.copy()
+                headers.popall(hdrs.RANGE, None)
+                headers.popall(hdrs.IF_RANGE, None)
+                request = request.clone(headers=headers)
+        return await super().prepare(request)
 
 
 @PromptServer.instance.routes.get("/mogu_batch_process/view_proxy")
@@ -65,14 +202,41 @@ async def view_proxy(request):
     if not file_path:
         return web.Response(status=404)
 
-    return web.FileResponse(
-        file_path,
-        headers={
-            # Small private cache window to reduce repeated reads while browsing.
-            "Cache-Control": "private, max-age=300",
-            "Accept-Ranges": "bytes",
-        },
-    )
+    # resolve_preview_file already checked the file; FileResponse stats it again off the event loop,
+    # sets ETag/Last-Modified and answers If-None-Match, If-Modified-Since, Range and date If-Range.
+    return _PreviewFileResponse(file_path, headers={"Cache-Control": _PREVIEW_CACHE_CONTROL})
+
+
+@PromptServer.instance.routes.get("/mogu_batch_process/thumbnail")
+async def thumbnail(request):
+    preview_id = str(request.rel_url.query.get("id") or "").strip()
+    if not preview_id:
+        return web.Response(status=400)
+
+    file_path = resolve_preview_file(preview_id)
+    if not file_path:
+        return web.Response(status=404)
+
+    max_edge = _parse_non_negative_int(request.rel_url.query.get("max_edge"), DEFAULT_THUMBNAIL_EDGE)
+    max_edge = clamp_thumbnail_edge(max_edge)
+    image_format = str(request.rel_url.query.get("format") or "webp").strip().lower()
+    spec = thumbnail_spec(file_path, max_edge, image_format)
+    if spec is None:
+        return web.Response(status=404)
+
+    headers = {
+        "ETag": f'"{spec.etag}"',
+        "Last-Modified": formatdate(spec.last_modified, usegmt=True),
+        "Cache-Control": _PREVIEW_CACHE_CONTROL,
+    }
+    if _is_not_modified(request, spec.etag, spec.last_modified):
+        return web.Response(status=304, headers=headers)
+
+    data = await asyncio.wrap_future(submit_thumbnail(spec))
+    if data is None:
+        # Nothing we can render (e.g. no PyAV); the client falls back to view_proxy.
+        return web.Response(status=415)
+    return web.Response(body=data, content_type=spec.content_type, headers=headers)
 
 
 @PromptServer.instance.routes.post("/mogu_batch_process/get_media_metadata")
@@ -86,19 +250,48 @@ async def get_media_metadata(request):
     if not isinstance(filenames, list):
         filenames = []
 
+    # Stat work runs on a bounded pool; the event loop only merges the chunk results.
     metadata = {}
+    for chunk_metadata in await asyncio.gather(*map(asyncio.wrap_future, submit_media_metadata(filenames))):
+        metadata.update(chunk_metadata)
 
-    for name in filenames:
-        if not isinstance(name, str) or not name:
-            continue
+    return web.json_response({"ok": True, "metadata": metadata})
 
-        filepath = resolve_image_path(name) or resolve_video_path(name)
 
-        if filepath and os.path.isfile(filepath):
-            try:
-                stat = os.stat(filepath)
-                metadata[name] = {"mtime": stat.st_mtime, "size": stat.st_size}
-            except OSError:
-                pass
+@PromptServer.instance.routes.post("/mogu_batch_process/probe_media")
+async def probe_media(request):
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
 
-    return web.json_response({"ok": True, "metadata": metadata})
+    filenames = payload.get("filenames", [])
+    if not isinstance(filenames, list):
+        filenames = []
+
+    # Header-only probes (size, frame count, fps, duration), cached per file stat.
+    probes = {}
+    for chunk_probes in await asyncio.gather(*map(asyncio.wrap_future, submit_media_probes(filenames))):
+        probes.update(chunk_probes)
+
+    return web.json_response({"ok": True, "probes": probes})
+
+
+@PromptServer.instance.routes.get("/mogu_batch_process/stats")
+async def get_stats(request):
+    # Per-stage timings of recent loader executions and scans, plus totals per kind.
+    return web.json_response({"ok": True, **stage_stats.snapshot()})
+
+
+@PromptServer.instance.routes.post("/mogu_batch_process/stats")
+async def update_stats(request):
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
+
+    if isinstance(payload.get("enabled"), bool):
+        stage_stats.set_enabled(payload["enabled"])
+    if payload.get("reset"):
+        stage_stats.reset()
+    return web.json_response({"ok": True, "enabled": stage_stats.enabled})
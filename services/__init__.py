@@ -1,13 +1,94 @@
-from .image_service import load_image_tensor
-from .media_scan_service import build_image_scan_payload, build_video_scan_payload
-from .preview_proxy_service import register_preview_file, resolve_preview_file
-from .video_service import decode_video_frames
+from .decode_pool import imap_ordered, resolve_worker_count
+from .frame_buffer import FrameBatchBuilder, RawFrameCollector
+from .frame_cache import decoded_frame_cache, disk_frame_cache
+from .image_service import (
+    decode_image_array,
+    estimate_decoded_image_bytes,
+    estimate_image_frame_count,
+    load_image_array,
+    load_image_tensor,
+)
+from .media_metadata_service import submit_media_metadata
+from .media_probe_service import MediaProbe, probe_media, submit_media_probes
+from .media_scan_service import ScanCancelled, ScanProgress, build_image_scan_payload, build_video_scan_payload
+from .pixel_convert import uint8_to_float_frames
+from .prefetch_service import (
+    MAX_PREFETCH_DEPTH,
+    prefetch_buffer,
+    schedule_image_prefetch,
+    schedule_video_prefetch,
+    take_prefetched_image,
+    take_prefetched_video,
+)
+from .preview_proxy_service import register_preview_file, register_preview_files, resolve_preview_file
+from .scan_job_service import SCAN_KINDS, ScanJob, cancel_scan_job, get_scan_job, start_scan_job, submit_scan
+from .thumbnail_service import (
+    DEFAULT_THUMBNAIL_EDGE,
+    THUMBNAIL_FORMATS,
+    ThumbnailSpec,
+    clamp_thumbnail_edge,
+    submit_thumbnail,
+    thumbnail_cache,
+    thumbnail_spec,
+)
+from .video_chunk_service import VideoChunkCursor, VideoChunkResult, decode_video_chunk
+from .video_service import (
+    VideoDecodeResult,
+    decode_video_frames,
+    estimate_decoded_video_bytes,
+    estimate_video_frame_count,
+    load_video_frames,
+)
 
 __all__ = [
+    "DEFAULT_THUMBNAIL_EDGE",
+    "MAX_PREFETCH_DEPTH",
+    "SCAN_KINDS",
+    "THUMBNAIL_FORMATS",
+    "FrameBatchBuilder",
+    "MediaProbe",
+    "RawFrameCollector",
+    "ScanCancelled",
+    "ScanJob",
+    "ScanProgress",
+    "ThumbnailSpec",
+    "VideoChunkCursor",
+    "VideoChunkResult",
+    "VideoDecodeResult",
     "build_image_scan_payload",
     "build_video_scan_payload",
+    "cancel_scan_job",
+    "clamp_thumbnail_edge",
+    "decode_image_array",
+    "decode_video_chunk",
     "decode_video_frames",
+    "decoded_frame_cache",
+    "disk_frame_cache",
+    "estimate_image_frame_count",
+    "estimate_decoded_image_bytes",
+    "estimate_decoded_video_bytes",
+    "estimate_video_frame_count",
+    "get_scan_job",
+    "imap_ordered",
+    "load_image_array",
     "load_image_tensor",
+    "load_video_frames",
+    "prefetch_buffer",
+    "probe_media",
     "register_preview_file",
+    "register_preview_files",
     "resolve_preview_file",
+    "resolve_worker_count",
+    "schedule_image_prefetch",
+    "schedule_video_prefetch",
+    "start_scan_job",
+    "submit_media_metadata",
+    "submit_media_probes",
+    "submit_scan",
+    "submit_thumbnail",
+    "take_prefetched_image",
+    "take_prefetched_video",
+    "thumbnail_cache",
+    "thumbnail_spec",
+    "uint8_to_float_frames",
 ]
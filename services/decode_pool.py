@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from ..core import stage_stats
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+_MAX_AUTO_WORKERS = 32
+# Bound queued results so a slow consumer cannot pile up a whole batch of decoded frames.
+_INFLIGHT_PER_WORKER = 2
+
+
+def resolve_worker_count(requested: int, item_count: int) -> int:
+    if item_count <= 1:
+        return 1
+    if requested <= 0:
+        requested = min(os.cpu_count() or 1, _MAX_AUTO_WORKERS)
+    return max(1, min(int(requested), item_count))
+
+
+def imap_ordered(func: Callable[[_T], _R], items: Iterable[_T], workers: int) -> Iterator[_R]:
+    values = list(items)
+    worker_count = resolve_worker_count(workers, len(values))
+    if worker_count <= 1:
+        for value in values:
+            yield func(value)
+        return
+
+    # Pool threads report their stage timings into the caller's execution.
+    func = stage_stats.bind(func)
+    max_inflight = worker_count * _INFLIGHT_PER_WORKER
+    pending: deque[Future] = deque()
+    executor = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="gugu-decode")
+    try:
+        for value in values:
+            pending.append(executor.submit(func, value))
+            if len(pending) >= max_inflight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
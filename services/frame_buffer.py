@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+from ..core import stage_stats
+
+from .pixel_convert import uint8_to_float_frames
+
+# Each extra segment holds at least this share of the frames written so far.
+_GROWTH_RATIO = 0.5
+# Unused tail tolerated before build() compacts the buffer with a copy.
+_MAX_SLACK_RATIO = 0.125
+
+
+class FrameBatchBuilder:
+    # Frames land in one buffer sized from the capacity hint. A short hint adds further segments
+    # instead of reallocating, so nothing is copied while decoding; build() then joins them once.
+    # Peak memory is at most the allocated segments plus one final-size output, i.e. torch.cat's 2x,
+    # and only when the hint was wrong (short, or more than _MAX_SLACK_RATIO too long).
+    def __init__(self, capacity_hint: int = 0) -> None:
+        self._capacity_hint = max(int(capacity_hint), 0)
+        self._segments: list[torch.Tensor] = []
+        self._last_start = 0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def extend(self, frames: torch.Tensor) -> None:
+        self._write(frames, lambda part, target: target.copy_(part))
+
+    def extend_uint8(self, frames: np.ndarray) -> None:
+        self._write(frames, lambda part, target: uint8_to_float_frames(part, out=target))
+
+    def truncate(self, count: int) -> None:
+        self._count = min(max(int(count), 0), self._count)
+        if self._count == 0 and self._segments:
+            # Nothing kept yet, so the next frame may still pick a different frame shape.
+            capacity = sum(int(segment.shape[0]) for segment in self._segments)
+            self._capacity_hint = max(self._capacity_hint, capacity)
+            self._segments = []
+            self._last_start = 0
+            return
+        # Drop segments that now lie entirely past the kept frames.
+        while len(self._segments) > 1 and self._last_start >= self._count:
+            self._segments.pop()
+            self._last_start -= int(self._segments[-1].shape[0])
+
+    def build(self) -> torch.Tensor | None:
+        segments = self._segments
+        count = self._count
+        self._segments = []
+        self._last_start = 0
+        self._count = 0
+        if not segments or count == 0:
+            return None
+
+        if len(segments) == 1:
+            capacity = int(segments[0].shape[0])
+            output = segments[0][:count]
+            if capacity - count > capacity * _MAX_SLACK_RATIO:
+                with stage_stats.stage("output_compact") as stage:
+                    output = output.clone()
+                    stage.add_bytes(output.nbytes)
+            return output
+
+        with stage_stats.stage("output_join") as stage:
+            output = torch.empty((count, *segments[0].shape[1:]), dtype=torch.float32)
+            stage.add_bytes(output.nbytes)
+            position = 0
+            while segments:
+                # Release each segment as soon as it is copied.
+                segment = segments.pop(0)
+                take = min(int(segment.shape[0]), count - position)
+                output[position : position + take].copy_(segment[:take])
+                position += take
+                del segment
+        return output
+
+    def _write(self, frames, convert) -> None:
+        frame_total = int(frames.shape[0])
+        written = 0
+        while written < frame_total:
+            target = self._free_slots(tuple(frames.shape[1:]), frame_total - written)
+            taken = int(target.shape[0])
+            convert(frames[written : written + taken], target)
+            written += taken
+            self._count += taken
+
+    def _free_slots(self, frame_shape: tuple[int, ...], wanted: int) -> torch.Tensor:
+        if not self._segments:
+            capacity = max(self._capacity_hint, wanted)
+            with stage_stats.stage("output_alloc") as stage:
+                self._segments.append(torch.empty((capacity, *frame_shape), dtype=torch.float32))
+                stage.add_bytes(self._segments[0].nbytes)
+        elif tuple(self._segments[0].shape[1:]) != frame_shape:
+            expected = tuple(self._segments[0].shape[1:])
+            raise ValueError(f"Frame shape mismatch: expected {expected}, got {frame_shape}")
+
+        segment = self._segments[-1]
+        offset = self._count - self._last_start
+        if offset >= int(segment.shape[0]):
+            capacity = max(wanted, int(self._count * _GROWTH_RATIO) + 1)
+            with stage_stats.stage("output_grow") as stage:
+                self._last_start += int(segment.shape[0])
+                segment = torch.empty((capacity, *frame_shape), dtype=torch.float32)
+                self._segments.append(segment)
+                stage.add_bytes(segment.nbytes)
+            offset = 0
+        return segment[offset : offset + wanted]
+
+
+class RawFrameCollector:
+    def __init__(self) -> None:
+        self._chunks: list[np.ndarray] = []
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def chunks(self) -> tuple[np.ndarray, ...]:
+        return tuple(self._chunks)
+
+    def extend_uint8(self, frames: np.ndarray) -> None:
+        if int(frames.shape[0]) == 0:
+            return
+        self._chunks.append(frames)
+        self._count += int(frames.shape[0])
+
+    def drain_into(self, builder: FrameBatchBuilder) -> None:
+        chunks, self._chunks, self._count = self._chunks, [], 0
+        for frames in chunks:
+            builder.extend_uint8(frames)
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from ..core import new_sha256, read_env_int, update_hash_with_file_stat, update_hash_with_value
+
+# Off by default like prefetching: a warm cache keeps decoded frames resident in the ComfyUI process.
+_DEFAULT_CACHE_MB = 0
+_DEFAULT_DISK_CACHE_MB = 10240
+_FRAMES_SUFFIX = ".npy"
+_META_SUFFIX = ".json"
+_TEMP_SUFFIX = ".tmp"
+_STALE_TEMP_SECONDS = 3600
+# Keys are sha256 hex digests; the directory is configurable, so eviction only touches names written here.
+_KEY_PATTERN = r"[0-9a-f]{64}"
+_FRAMES_NAME = re.compile(rf"{_KEY_PATTERN}{re.escape(_FRAMES_SUFFIX)}")
+_TEMP_NAME = re.compile(
+    rf"{_KEY_PATTERN}(?:{re.escape(_FRAMES_SUFFIX)}|{re.escape(_META_SUFFIX)})"
+    rf"\.\d+\.[0-9a-f]{{8}}{re.escape(_TEMP_SUFFIX)}"
+)
+
+
+@dataclass(frozen=True)
+class CachedFrames:
+    chunks: tuple[np.ndarray, ...]
+    fps: float = 0.0
+    expected_hw: tuple[int, int] | None = None
+    next_frame: int | None = None
+
+    @property
+    def frame_count(self) -> int:
+        return sum(int(chunk.shape[0]) for chunk in self.chunks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(chunk.nbytes) for chunk in self.chunks)
+
+
+class DecodedFrameCache:
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max(int(max_bytes), 0)
+        self._entries: OrderedDict[str, CachedFrames] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def can_keep(self, nbytes: int) -> bool:
+        return self.enabled and 0 < nbytes <= self._max_bytes
+
+    def get(self, key: str | None) -> CachedFrames | None:
+        if key is None or not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str | None, entry: CachedFrames) -> None:
+        nbytes = entry.nbytes
+        if key is None or nbytes > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._total_bytes += nbytes
+            while self._total_bytes > self._max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+class DiskFrameCache:
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self._cache_dir = os.path.abspath(cache_dir) if cache_dir else ""
+        self._max_bytes = max(int(max_bytes), 0)
+        self._total_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._cache_dir) and self._max_bytes > 0
+
+    def can_keep(self, nbytes: int) -> bool:
+        return self.enabled and 0 < nbytes <= self._max_bytes
+
+    def _entry_paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self._cache_dir, key)
+        return base + _FRAMES_SUFFIX, base + _META_SUFFIX
+
+    def get(self, key: str | None) -> CachedFrames | None:
+        if key is None or not self.enabled:
+            return None
+
+        frames_path, meta_path = self._entry_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as handle:
+                meta = json.load(handle)
+            # Copy-on-write mapping: pages are read lazily from disk and the array stays writable.
+            frames = np.load(frames_path, mmap_mode="c")
+            os.utime(frames_path)
+        except (OSError, ValueError):
+            return None
+
+        expected_hw = meta.get("expected_hw")
+        next_frame = meta.get("next_frame")
+        return CachedFrames(
+            chunks=(frames,),
+            fps=float(meta.get("fps", 0.0)),
+            expected_hw=tuple(expected_hw) if expected_hw else None,
+            next_frame=int(next_frame) if next_frame is not None else None,
+        )
+
+    def frame_count(self, key: str | None) -> int | None:
+        # Reads only the .npy header, so callers can size buffers without mapping the frames.
+        if key is None or not self.enabled:
+            return None
+        frames_path, _ = self._entry_paths(key)
+        try:
+            with open(frames_path, "rb") as handle:
+                if np.lib.format.read_magic(handle) == (1, 0):
+                    shape, _, _ = np.lib.format.read_array_header_1_0(handle)
+                else:
+                    shape, _, _ = np.lib.format.read_array_header_2_0(handle)
+        except (OSError, ValueError):
+            return None
+        return int(shape[0]) if shape else None
+
+    def put(self, key: str | None, entry: CachedFrames) -> None:
+        nbytes = entry.nbytes
+        if key is None or not self.enabled or not entry.chunks or nbytes > self._max_bytes:
+            return
+
+        frames_path, meta_path = self._entry_paths(key)
+        token = f".{os.getpid()}.{secrets.token_hex(4)}{_TEMP_SUFFIX}"
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(meta_path + token, "w", encoding="utf-8") as handle:
+                meta = {"fps": entry.fps, "expected_hw": entry.expected_hw, "next_frame": entry.next_frame}
+                json.dump(meta, handle)
+            self._write_frames(frames_path + token, entry.chunks)
+            # Metadata lands first; an entry only counts once its frames file is renamed into place.
+            os.replace(meta_path + token, meta_path)
+            os.replace(frames_path + token, frames_path)
+        except OSError:
+            for temp_path in (meta_path + token, frames_path + token):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += nbytes
+            if self._total_bytes is None or self._total_bytes > self._max_bytes:
+                self._evict()
+
+    @staticmethod
+    def _write_frames(path: str, chunks: tuple[np.ndarray, ...]) -> None:
+        first = chunks[0]
+        shape = (sum(int(chunk.shape[0]) for chunk in chunks), *first.shape[1:])
+        header = {"descr": np.lib.format.dtype_to_descr(first.dtype), "fortran_order": False, "shape": shape}
+        # Stream chunks after a hand-written .npy header instead of concatenating them in memory.
+        with open(path, "wb") as handle:
+            np.lib.format.write_array_header_1_0(handle, header)
+            for chunk in chunks:
+                handle.write(np.ascontiguousarray(chunk).data)
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, str]] = []
+        stale_before = time.time() - _STALE_TEMP_SECONDS
+        try:
+            with os.scandir(self._cache_dir) as iterator:
+                for dir_entry in iterator:
+                    if not dir_entry.is_file():
+                        continue
+                    if _TEMP_NAME.fullmatch(dir_entry.name):
+                        if dir_entry.stat().st_mtime < stale_before:
+                            # Left behind by a writer that died before renaming its entry into place.
+                            try:
+                                os.remove(dir_entry.path)
+                            except OSError:
+                                pass
+                    elif _FRAMES_NAME.fullmatch(dir_entry.name):
+                        stat = dir_entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, frames_path in entries:
+            if total <= self._max_bytes:
+                break
+            for path in (frames_path, frames_path[: -len(_FRAMES_SUFFIX)] + _META_SUFFIX):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self._total_bytes = total
+
+
+def frame_cache_key(kind: str, file_path: str, **decode_params) -> str | None:
+    abs_path = os.path.abspath(file_path)
+    if not os.path.isfile(abs_path):
+        return None
+
+    hasher = new_sha256()
+    update_hash_with_value(hasher, kind)
+    update_hash_with_value(hasher, abs_path)
+    update_hash_with_file_stat(hasher, abs_path)
+    for name in sorted(decode_params):
+        update_hash_with_value(hasher, name)
+        update_hash_with_value(hasher, decode_params[name])
+    return hasher.hexdigest()
+
+
+def frame_caching_enabled() -> bool:
+    return decoded_frame_cache.enabled or disk_frame_cache.enabled
+
+
+def frame_cache_can_keep(nbytes: int) -> bool:
+    # Lets callers skip staging frames for an entry that neither cache would accept.
+    return decoded_frame_cache.can_keep(nbytes) or disk_frame_cache.can_keep(nbytes)
+
+
+def cached_frame_count(key: str | None) -> int | None:
+    entry = decoded_frame_cache.get(key)
+    if entry is not None:
+        return entry.frame_count
+    return disk_frame_cache.frame_count(key)
+
+
+def lookup_cached_frames(key: str | None) -> CachedFrames | None:
+    entry = decoded_frame_cache.get(key)
+    if entry is None:
+        entry = disk_frame_cache.get(key)
+        if entry is not None and decoded_frame_cache.can_keep(entry.nbytes):
+            # Promote an in-memory copy: a mapped array would keep its file open (blocking eviction and
+            # os.replace on Windows) while counting against the RAM budget without living in RAM.
+            entry = replace(entry, chunks=tuple(np.array(chunk) for chunk in entry.chunks))
+            decoded_frame_cache.put(key, entry)
+    return entry
+
+
+def store_cached_frames(key: str | None, entry: CachedFrames) -> None:
+    decoded_frame_cache.put(key, entry)
+    disk_frame_cache.put(key, entry)
+
+
+decoded_frame_cache = DecodedFrameCache(read_env_int("GUGU_BATCH_FRAME_CACHE_MB", _DEFAULT_CACHE_MB) * 1024 * 1024)
+disk_frame_cache = DiskFrameCache(
+    os.environ.get("GUGU_BATCH_DISK_CACHE_DIR", "").strip(),
+    read_env_int("GUGU_BATCH_DISK_CACHE_MB", _DEFAULT_DISK_CACHE_MB) * 1024 * 1024,
+)
@@ -6,33 +6,105 @@ from PIL import Image, ImageOps, ImageSequence
 
 import node_helpers
 
+from ..core import stage_stats
+from .frame_cache import (
+    CachedFrames,
+    cached_frame_count,
+    frame_cache_key,
+    frame_caching_enabled,
+    lookup_cached_frames,
+    store_cached_frames,
+)
+from .media_probe_service import probe_media
+from .pixel_convert import scaled_frame_size, uint8_to_float_frames
+
 _EXCLUDED_MULTI_FRAME_FORMATS = {"MPO"}
 
 
-def load_image_tensor(image_path: str) -> torch.Tensor | None:
-    img = node_helpers.pillow(Image.open, image_path)
+def estimate_image_frame_count(image_path: str, max_edge: int = 0) -> int:
+    if frame_caching_enabled():
+        # A cached decode already knows its frame count; no need to open the file for a header probe.
+        frame_count = cached_frame_count(frame_cache_key("image", image_path, max_edge=max_edge))
+        if frame_count is not None:
+            return frame_count
+    probe = probe_media(image_path, kind="image")
+    return probe.frame_count if probe is not None else 0
+
+
+def estimate_decoded_image_bytes(image_path: str, max_edge: int = 0) -> int:
+    # Size of all frames as uint8 RGB, from the header alone; 0 when the header cannot tell.
+    probe = probe_media(image_path, kind="image")
+    if probe is None or probe.width <= 0 or probe.height <= 0:
+        return 0
+    width, height = scaled_frame_size(probe.width, probe.height, max_edge)
+    return probe.frame_count * width * height * 3
 
-    frames: list[torch.Tensor] = []
+
+def decode_image_array(image_path: str, max_edge: int = 0) -> np.ndarray | None:
+    with stage_stats.stage("image_open"):
+        img = node_helpers.pillow(Image.open, image_path)
+    single_frame = img.format in _EXCLUDED_MULTI_FRAME_FORMATS
+    if max_edge > 0:
+        # JPEG decodes straight at a 1/2..1/8 scale that still covers the target size; other formats ignore this.
+        # The target keeps the aspect ratio: a square box would force the short side up to max_edge too.
+        img.draft("RGB", scaled_frame_size(img.width, img.height, max_edge))
+
+    frames: list[np.ndarray] = []
     expected_size: tuple[int, int] | None = None
 
     for frame in ImageSequence.Iterator(img):
-        frame = node_helpers.pillow(ImageOps.exif_transpose, frame)
+        # exif_transpose loads the frame, so pixel decoding (and its file reads) land in this stage.
+        with stage_stats.stage("image_decode"):
+            frame = node_helpers.pillow(ImageOps.exif_transpose, frame)
+
+        with stage_stats.stage("image_convert") as stage:
+            if frame.mode == "I":
+                frame = frame.point(lambda pixel: pixel * (1 / 255))
+            pil_image = frame.convert("RGB")
 
-        if frame.mode == "I":
-            frame = frame.point(lambda pixel: pixel * (1 / 255))
-        pil_image = frame.convert("RGB")
+            if expected_size is None:
+                expected_size = pil_image.size
+            if pil_image.size != expected_size:
+                continue
 
-        if expected_size is None:
-            expected_size = pil_image.size
-        if pil_image.size != expected_size:
-            continue
+            target_size = scaled_frame_size(*pil_image.size, max_edge)
+            if target_size != pil_image.size:
+                pil_image = pil_image.resize(target_size, Image.LANCZOS, reducing_gap=3.0)
 
-        arr = np.array(pil_image).astype(np.float32) / 255.0
-        frames.append(torch.from_numpy(arr)[None,])
+            rgb = np.array(pil_image)
+            stage.add_bytes(rgb.nbytes)
+        frames.append(rgb)
+        if single_frame:
+            break
 
     if not frames:
         return None
 
-    if len(frames) > 1 and img.format not in _EXCLUDED_MULTI_FRAME_FORMATS:
-        return torch.cat(frames, dim=0)
-    return frames[0]
+    if len(frames) > 1:
+        with stage_stats.stage("image_stack") as stage:
+            stacked = np.stack(frames)
+            stage.add_bytes(stacked.nbytes)
+        return stacked
+    return frames[0][None,]
+
+
+def load_image_array(image_path: str, max_edge: int = 0) -> np.ndarray | None:
+    cache_key = frame_cache_key("image", image_path, max_edge=max_edge) if frame_caching_enabled() else None
+    cached = lookup_cached_frames(cache_key)
+    if cached is not None:
+        stage_stats.count("frame_cache_hits")
+        return cached.chunks[0]
+    if cache_key is not None:
+        stage_stats.count("frame_cache_misses")
+
+    frames = decode_image_array(image_path, max_edge=max_edge)
+    if frames is not None:
+        store_cached_frames(cache_key, CachedFrames(chunks=(frames,)))
+    return frames
+
+
+def load_image_tensor(image_path: str, max_edge: int = 0) -> torch.Tensor | None:
+    frames = load_image_array(image_path, max_edge=max_edge)
+    if frames is None:
+        return None
+    return uint8_to_float_frames(frames)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import stat as stat_module
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ..core import resolve_media_paths, stat_cache
+
+_METADATA_WORKERS = 8
+_METADATA_CHUNK_SIZE = 512
+
+# Shared by all metadata requests, so a large sort cannot take over more than these threads.
+_metadata_executor = ThreadPoolExecutor(max_workers=_METADATA_WORKERS, thread_name_prefix="gugu-stat")
+
+
+def _collect_chunk_metadata(names: list[str]) -> dict[str, dict[str, float | int]]:
+    metadata: dict[str, dict[str, float | int]] = {}
+    for name, file_path in zip(names, resolve_media_paths(names)):
+        if not file_path:
+            continue
+        stat = stat_cache.stat(file_path)
+        if stat is None or not stat_module.S_ISREG(stat.st_mode):
+            continue
+        metadata[name] = {"mtime": stat.st_mtime, "size": stat.st_size}
+    return metadata
+
+
+def submit_media_metadata(names: list[str]) -> list[Future]:
+    clean_names = [name for name in names if isinstance(name, str) and name]
+    return [
+        _metadata_executor.submit(_collect_chunk_metadata, clean_names[start : start + _METADATA_CHUNK_SIZE])
+        for start in range(0, len(clean_names), _METADATA_CHUNK_SIZE)
+    ]
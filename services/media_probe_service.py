@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from PIL import Image
+
+from ..core import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, resolve_media_paths, stat_cache
+
+_MAX_PROBE_ENTRIES = 50000
+_PROBE_WORKERS = 8
+_PROBE_CHUNK_SIZE = 128
+_EXCLUDED_MULTI_FRAME_FORMATS = {"MPO"}
+# EXIF orientations that swap width and height once the loader applies exif_transpose.
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_EXIF_ORIENTATION_TAG = 0x0112
+
+_probe_executor = ThreadPoolExecutor(max_workers=_PROBE_WORKERS, thread_name_prefix="gugu-probe")
+
+
+@dataclass(frozen=True)
+class MediaProbe:
+    kind: str
+    width: int
+    height: int
+    frame_count: int
+    fps: float = 0.0
+    duration: float = 0.0
+    codec: str = ""
+
+    def to_payload(self) -> dict:
+        return asdict(self)
+
+
+# Keyed by (absolute path, kind); an entry is only reused while size and mtime still match.
+_probe_cache: OrderedDict[tuple[str, str], tuple[int, int, MediaProbe | None]] = OrderedDict()
+_probe_lock = threading.Lock()
+
+
+def _count_stream_frames(video_stream) -> int:
+    if video_stream.frames:
+        return int(video_stream.frames)
+    rate = video_stream.average_rate or video_stream.base_rate
+    if video_stream.duration is None or video_stream.time_base is None or rate is None:
+        return 0
+    return int(math.ceil(float(video_stream.duration * video_stream.time_base) * float(rate)))
+
+
+def _probe_image(file_path: str) -> MediaProbe:
+    # Image.open only parses headers; pixels are never decoded here.
+    with Image.open(file_path) as img:
+        width, height = img.size
+        if img.getexif().get(_EXIF_ORIENTATION_TAG) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        if img.format in _EXCLUDED_MULTI_FRAME_FORMATS:
+            frame_count = 1
+        else:
+            frame_count = max(int(getattr(img, "n_frames", 1) or 1), 1)
+        return MediaProbe(
+            kind="image",
+            width=int(width),
+            height=int(height),
+            frame_count=frame_count,
+            codec=(img.format or "").lower(),
+        )
+
+
+def _probe_video(file_path: str) -> MediaProbe | None:
+    import av
+
+    with av.open(file_path) as container:
+        video_stream = next((stream for stream in container.streams if stream.type == "video"), None)
+        if video_stream is None:
+            return None
+
+        rate = video_stream.average_rate or video_stream.base_rate
+        if video_stream.duration is not None and video_stream.time_base is not None:
+            duration = float(video_stream.duration * video_stream.time_base)
+        elif container.duration is not None:
+            duration = container.duration / av.time_base
+        else:
+            duration = 0.0
+
+        codec_context = video_stream.codec_context
+        return MediaProbe(
+            kind="video",
+            width=int(codec_context.width or 0),
+            height=int(codec_context.height or 0),
+            frame_count=_count_stream_frames(video_stream),
+            fps=float(rate) if rate else 0.0,
+            duration=duration,
+            codec=codec_context.name or "",
+        )
+
+
+def _kind_from_extension(file_path: str) -> str:
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return ""
+
+
+def probe_media(file_path: str, kind: str | None = None) -> MediaProbe | None:
+    stat = stat_cache.stat(file_path)
+    if stat is None:
+        return None
+
+    abs_path = os.path.abspath(file_path)
+    kind = kind or _kind_from_extension(abs_path)
+    if kind not in ("image", "video"):
+        return None
+
+    cache_key = (abs_path, kind)
+    with _probe_lock:
+        cached = _probe_cache.get(cache_key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            _probe_cache.move_to_end(cache_key)
+            return cached[2]
+
+    try:
+        probe = _probe_image(abs_path) if kind == "image" else _probe_video(abs_path)
+    except ImportError:
+        # Missing PyAV says nothing about the file; do not remember it as unreadable.
+        return None
+    except Exception:
+        probe = None
+
+    with _probe_lock:
+        _probe_cache[cache_key] = (stat.st_size, stat.st_mtime_ns, probe)
+        _probe_cache.move_to_end(cache_key)
+        while len(_probe_cache) > _MAX_PROBE_ENTRIES:
+            _probe_cache.popitem(last=False)
+    return probe
+
+
+def _probe_chunk(names: list[str]) -> dict[str, dict]:
+    probes: dict[str, dict] = {}
+    for name, file_path in zip(names, resolve_media_paths(names)):
+        probe = probe_media(file_path) if file_path else None
+        if probe is not None:
+            probes[name] = probe.to_payload()
+    return probes
+
+
+def submit_media_probes(names: list[str]) -> list[Future]:
+    clean_names = [name for name in names if isinstance(name, str) and name]
+    return [
+        _probe_executor.submit(_probe_chunk, clean_names[start : start + _PROBE_CHUNK_SIZE])
+        for start in range(0, len(clean_names), _PROBE_CHUNK_SIZE)
+    ]
@@ -1,15 +1,60 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
+import threading
+from typing import Iterator
+
 from ..core import (
     InputViewParams,
     ScannedImageEntry,
     ScannedVideoEntry,
-    list_images_from_server_dir,
-    list_videos_from_server_dir,
-    resolve_image_path,
-    resolve_video_path,
+    iter_images_from_server_dir,
+    iter_videos_from_server_dir,
+    stage_stats,
+    stat_cache,
 )
-from .preview_proxy_service import register_preview_file
+from .preview_proxy_service import register_preview_files
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+class ScanProgress:
+    def __init__(self) -> None:
+        self.scanned = 0
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def advance(self) -> None:
+        if self._cancelled.is_set():
+            raise ScanCancelled()
+        self.scanned += 1
+
+
+def _encode_scan_cursor(after: str, offset: int) -> str:
+    raw = json.dumps({"after": after, "offset": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_scan_cursor(cursor: str) -> tuple[str | None, int]:
+    if not cursor:
+        return None, 0
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        after = str(state["after"])
+        offset = int(state["offset"])
+    except (binascii.Error, KeyError, TypeError, UnicodeError, ValueError) as exc:
+        raise ValueError("invalid scan cursor") from exc
+    return after, max(offset, 0)
 
 
 def _serialize_preview(preview: InputViewParams) -> dict[str, str]:
@@ -19,38 +64,101 @@ def _serialize_preview(preview: InputViewParams) -> dict[str, str]:
     return payload
 
 
+def _collect_entries(
+    entries: Iterator[ScannedImageEntry] | Iterator[ScannedVideoEntry],
+    limit: int,
+    progress: ScanProgress | None,
+) -> list[ScannedImageEntry] | list[ScannedVideoEntry]:
+    collected = []
+    for entry in entries:
+        if progress is not None:
+            progress.advance()
+        collected.append(entry)
+        if limit > 0 and len(collected) >= limit:
+            break
+    return collected
+
+
 def _build_scan_payload(
-    all_entries: list[ScannedImageEntry] | list[ScannedVideoEntry],
+    entries: Iterator[ScannedImageEntry] | Iterator[ScannedVideoEntry],
     max_items: int,
-    resolve_path,
+    progress: ScanProgress | None = None,
+    page_size: int = 0,
+    offset: int = 0,
 ) -> dict:
-    limited_entries = all_entries[:max_items] if max_items > 0 else all_entries
+    limit = max(max_items - offset, 0) if max_items > 0 else 0
+    if page_size > 0:
+        limit = min(limit, page_size) if max_items > 0 else page_size
+    exhausted = max_items > 0 and limit == 0
+
+    # One entry past the limit is enough to tell whether more exist without walking the rest.
+    with stage_stats.stage("scan_walk"):
+        all_entries = [] if exhausted else _collect_entries(entries, limit + 1 if limit > 0 else 0, progress)
+    stage_stats.count("entries_scanned", len(all_entries))
+    has_more = exhausted or (limit > 0 and len(all_entries) > limit)
+    limited_entries = all_entries[:limit] if has_more else all_entries
+
+    if progress is not None and progress.cancelled:
+        raise ScanCancelled()
+    # Seeds the shared stat cache: thumbnails and a date sort right after the scan stat these same files.
+    with stage_stats.stage("stat_seed"):
+        for entry in limited_entries:
+            stat_cache.stat(entry.source_path)
+    # The walker already listed these files, so tokens are issued in one locked pass without stats.
+    with stage_stats.stage("register_previews"):
+        proxy_ids = register_preview_files([entry.source_path for entry in limited_entries], known_files=True)
 
     items: list[str] = []
     previews: dict[str, dict[str, str]] = {}
-    for entry in limited_entries:
+    for entry, proxy_id in zip(limited_entries, proxy_ids):
         items.append(entry.path)
-        resolved = resolve_path(entry.path)
-        proxy_id = register_preview_file(resolved) if resolved else None
         if proxy_id:
             previews[entry.path] = {"proxy_id": proxy_id}
         elif entry.preview is not None:
             previews[entry.path] = _serialize_preview(entry.preview)
 
+    returned = offset + len(items)
+    next_cursor = None
+    if has_more and items and (max_items <= 0 or returned < max_items):
+        # Entries come back in path order, so the last path is a stable resume point.
+        next_cursor = _encode_scan_cursor(items[-1], returned)
+
     return {
         "ok": True,
         "items": items,
         "previews": previews,
         "count": len(items),
-        "total": len(all_entries),
+        # The walk stops early once the limit is exceeded; total is then the count seen so far (a lower bound).
+        "total": offset + len(all_entries),
+        "total_known": not has_more,
+        "truncated": has_more and next_cursor is None,
+        "next_cursor": next_cursor,
     }
 
 
-def build_image_scan_payload(server_image_dir: str, max_images: int) -> dict:
-    all_entries = list_images_from_server_dir(server_image_dir)
-    return _build_scan_payload(all_entries, max_images, resolve_image_path)
+@stage_stats.track_execution("image_scan")
+def build_image_scan_payload(
+    server_image_dir: str,
+    max_images: int,
+    progress: ScanProgress | None = None,
+    page_size: int = 0,
+    cursor: str = "",
+) -> dict:
+    after, offset = _decode_scan_cursor(cursor)
+    cancelled = (lambda: progress.cancelled) if progress is not None else None
+    entries = iter_images_from_server_dir(server_image_dir, after, cancelled)
+    return _build_scan_payload(entries, max_images, progress, page_size, offset)
 
 
-def build_video_scan_payload(server_video_dir: str, max_videos: int) -> dict:
-    all_entries = list_videos_from_server_dir(server_video_dir)
-    return _build_scan_payload(all_entries, max_videos, resolve_video_path)
+@stage_stats.track_execution("video_scan")
+def build_video_scan_payload(
+    server_video_dir: str,
+    max_videos: int,
+    progress: ScanProgress | None = None,
+    page_size: int = 0,
+    cursor: str = "",
+) -> dict:
+    after, offset = _decode_scan_cursor(cursor)
+    cancelled = (lambda: progress.cancelled) if progress is not None else None
+    entries = iter_videos_from_server_dir(server_video_dir, after, cancelled)
+    return _build_scan_payload(entries, max_videos, progress, page_size, offset)
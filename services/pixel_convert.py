@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+from ..core import stage_stats
+
+
+def uint8_to_float_frames(frames: np.ndarray, out: torch.Tensor | None = None) -> torch.Tensor:
+    # One widening copy into the destination, then an in-place scale: no float temporaries.
+    with stage_stats.stage("float_convert") as stage:
+        source = torch.from_numpy(frames)
+        if out is None:
+            out = torch.empty(source.shape, dtype=torch.float32)
+            stage.add_bytes(out.nbytes)
+        out.copy_(source)
+        out.div_(255.0)
+    return out
+
+
+def scaled_frame_size(width: int, height: int, max_edge: int) -> tuple[int, int]:
+    # Only ever shrinks; the aspect ratio is kept and neither side drops below one pixel.
+    longest = max(width, height)
+    if max_edge <= 0 or longest <= max_edge:
+        return width, height
+    scale = max_edge / longest
+    return max(round(width * scale), 1), max(round(height * scale), 1)
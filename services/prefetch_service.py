@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+import numpy as np
+
+from ..core import read_env_int, stage_stats
+from .frame_buffer import RawFrameCollector
+from .image_service import estimate_decoded_image_bytes, load_image_array
+from .video_service import VideoDecodeResult, estimate_decoded_video_bytes, load_video_frames
+
+_DEFAULT_PREFETCH_MB = 1024
+_MAX_PREFETCH_ENTRIES = 16
+MAX_PREFETCH_DEPTH = 8
+
+
+class PrefetchBuffer:
+    # Loads run on one background thread, so prefetching never competes with more than one decode.
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self._max_entries = max(int(max_entries), 1)
+        self._max_bytes = max(int(max_bytes), 0)
+        self._entries: OrderedDict[Hashable, Future] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gugu-prefetch")
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def schedule(self, key: Hashable, load: Callable[[], tuple[object, int]], estimated_bytes: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            # The budget is reserved before loading, so an item that cannot fit is never decoded at all.
+            if estimated_bytes <= 0 or self._total_bytes + estimated_bytes > self._max_bytes:
+                stage_stats.count("prefetch_skipped")
+                return
+            future = self._executor.submit(load)
+            self._entries[key] = future
+            self._sizes[key] = estimated_bytes
+            self._total_bytes += estimated_bytes
+            self._evict_locked()
+        # Outside the lock: an already finished future runs the callback right here.
+        future.add_done_callback(lambda done, key=key: self._account(key, done))
+
+    def take(self, key: Hashable) -> object | None:
+        with self._lock:
+            future = self._entries.pop(key, None)
+            self._total_bytes -= self._sizes.pop(key, 0)
+        if future is None:
+            return None
+        if future.cancel():
+            # Not started yet; decoding in the foreground is no slower than waiting for it.
+            return None
+        try:
+            with stage_stats.stage("prefetch_wait"):
+                value, _ = future.result()
+        except Exception:
+            # Failures are reported by the foreground decode, exactly as without prefetching.
+            return None
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            for future in self._entries.values():
+                future.cancel()
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def _account(self, key: Hashable, future: Future) -> None:
+        if future.cancelled():
+            return
+        # Swap the reservation for the real size; a failed load keeps nothing.
+        nbytes = future.result()[1] if future.exception() is None else 0
+        with self._lock:
+            if self._entries.get(key) is not future:
+                return
+            reserved = self._sizes.get(key, 0)
+            if self._total_bytes - reserved + nbytes > self._max_bytes:
+                # The estimate was short: drop the result just finished, which sits furthest ahead of the
+                # queue, rather than the nearer ones the next prompts will ask for first.
+                del self._entries[key]
+                self._total_bytes -= self._sizes.pop(key, 0)
+                return
+            self._sizes[key] = nbytes
+            self._total_bytes += nbytes - reserved
+
+    def _evict_locked(self) -> None:
+        # Oldest first: in a sequential run those are the items the queue has already moved past.
+        while len(self._entries) > self._max_entries:
+            key, future = self._entries.popitem(last=False)
+            future.cancel()
+            self._total_bytes -= self._sizes.pop(key, 0)
+
+
+def _prefetch_key(kind: str, file_path: str, options: dict) -> tuple | None:
+    # The file's size and mtime are part of the key, so an edited file is never served from the buffer.
+    abs_path = os.path.abspath(file_path)
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+    return (kind, abs_path, stat.st_size, stat.st_mtime_ns, tuple(sorted(options.items())))
+
+
+def _load_image(image_path: str, max_edge: int) -> tuple[np.ndarray | None, int]:
+    frames = load_image_array(image_path, max_edge=max_edge)
+    return frames, frames.nbytes if frames is not None else 0
+
+
+def _load_video(
+    video_path: str, decode_options: dict
+) -> tuple[tuple[VideoDecodeResult, RawFrameCollector], int]:
+    collector = RawFrameCollector()
+    result = load_video_frames(video_path, output=collector, **decode_options)
+    return (result, collector), sum(chunk.nbytes for chunk in collector.chunks)
+
+
+def schedule_image_prefetch(image_paths: list[str | None], max_edge: int = 0) -> None:
+    for image_path in image_paths:
+        key = _prefetch_key("image", image_path, {"max_edge": max_edge}) if image_path else None
+        if key is not None:
+            prefetch_buffer.schedule(
+                key,
+                lambda image_path=image_path: _load_image(image_path, max_edge),
+                estimate_decoded_image_bytes(image_path, max_edge),
+            )
+
+
+def take_prefetched_image(image_path: str | None, max_edge: int = 0) -> np.ndarray | None:
+    key = _prefetch_key("image", image_path, {"max_edge": max_edge}) if image_path else None
+    frames = prefetch_buffer.take(key) if key is not None else None
+    stage_stats.count("prefetch_hits" if frames is not None else "prefetch_misses")
+    return frames
+
+
+def schedule_video_prefetch(video_paths: list[str | None], decode_options: dict) -> None:
+    for video_path in video_paths:
+        key = _prefetch_key("video", video_path, decode_options) if video_path else None
+        if key is not None:
+            prefetch_buffer.schedule(
+                key,
+                lambda video_path=video_path: _load_video(video_path, decode_options),
+                estimate_decoded_video_bytes(
+                    video_path,
+                    decode_options["skip_frames"],
+                    decode_options["frame_load_cap"],
+                    decode_options["select_every_nth"],
+                    decode_options["max_edge"],
+                ),
+            )
+
+
+def take_prefetched_video(
+    video_path: str | None, decode_options: dict
+) -> tuple[VideoDecodeResult, RawFrameCollector] | None:
+    key = _prefetch_key("video", video_path, decode_options) if video_path else None
+    prefetched = prefetch_buffer.take(key) if key is not None else None
+    stage_stats.count("prefetch_hits" if prefetched is not None else "prefetch_misses")
+    return prefetched
+
+
+prefetch_buffer = PrefetchBuffer(
+    _MAX_PREFETCH_ENTRIES,
+    read_env_int("GUGU_BATCH_PREFETCH_MB", _DEFAULT_PREFETCH_MB) * 1024 * 1024,
+)
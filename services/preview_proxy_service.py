@@ -1,17 +1,19 @@
 from __future__ import annotations
 
+import base64
+import heapq
 import os
 import secrets
 import threading
 import time
 from dataclasses import dataclass
 
-from ..core import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+from ..core import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, stat_cache
 
 _TOKEN_TTL_SECONDS = 3600
 _MIN_TTL_SECONDS = 60
 _MAX_TOKEN_ENTRIES = 20000
-_GC_INTERVAL_SECONDS = 30
+_TOKEN_BYTES = 18
 
 
 @dataclass
@@ -22,8 +24,10 @@ class _PreviewTokenEntry:
 
 _preview_tokens: dict[str, _PreviewTokenEntry] = {}
 _path_to_token: dict[str, str] = {}
+# One (expires_at, token) item per token. Refreshing a TTL only updates the entry; the stale
+# heap item is re-queued with the new expiry when it reaches the top.
+_expiry_heap: list[tuple[float, str]] = []
 _token_lock = threading.Lock()
-_last_gc = 0.0
 
 
 _PREVIEWABLE_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
@@ -31,7 +35,7 @@ _PREVIEWABLE_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
 
 def _is_valid_preview_file(path: str) -> bool:
     ext = os.path.splitext(path)[1].lower()
-    return ext in _PREVIEWABLE_EXTENSIONS and os.path.isfile(path)
+    return ext in _PREVIEWABLE_EXTENSIONS and stat_cache.isfile(path)
 
 
 def _remove_token(token: str) -> None:
@@ -44,21 +48,16 @@ def _remove_token(token: str) -> None:
 
 
 def _prune_expired(now: float) -> None:
-    global _last_gc
-    if now - _last_gc < _GC_INTERVAL_SECONDS and len(_preview_tokens) <= _MAX_TOKEN_ENTRIES:
-        return
-    _last_gc = now
-
-    expired = [token for token, entry in _preview_tokens.items() if entry.expires_at <= now or not _is_valid_preview_file(entry.path)]
-    for token in expired:
-        _remove_token(token)
-
-    overflow = len(_preview_tokens) - _MAX_TOKEN_ENTRIES
-    if overflow <= 0:
-        return
-
-    oldest = sorted(_preview_tokens.items(), key=lambda item: item[1].expires_at)[:overflow]
-    for token, _ in oldest:
+    # Only the earliest expiries are looked at, so pruning is O(log n) per removed token.
+    # File validity is not checked here; resolve_preview_file does that lazily.
+    while _expiry_heap and (_expiry_heap[0][0] <= now or len(_preview_tokens) > _MAX_TOKEN_ENTRIES):
+        queued_expiry, token = heapq.heappop(_expiry_heap)
+        entry = _preview_tokens.get(token)
+        if entry is None:
+            continue
+        if entry.expires_at > queued_expiry:
+            heapq.heappush(_expiry_heap, (entry.expires_at, token))
+            continue
         _remove_token(token)
 
 
@@ -82,12 +81,73 @@ def register_preview_file(file_path: str, ttl_seconds: int = _TOKEN_TTL_SECONDS)
                 return existing
             _remove_token(existing)
 
-        token = secrets.token_urlsafe(18)
+        token = secrets.token_urlsafe(_TOKEN_BYTES)
         _preview_tokens[token] = _PreviewTokenEntry(path=abs_path, expires_at=expires_at)
         _path_to_token[abs_path] = token
+        heapq.heappush(_expiry_heap, (expires_at, token))
         return token
 
 
+def _new_tokens(count: int) -> list[str]:
+    # One urandom read for the whole batch; each slice encodes like secrets.token_urlsafe.
+    raw = secrets.token_bytes(_TOKEN_BYTES * count)
+    return [
+        base64.urlsafe_b64encode(raw[start : start + _TOKEN_BYTES]).rstrip(b"=").decode("ascii")
+        for start in range(0, len(raw), _TOKEN_BYTES)
+    ]
+
+
+def register_preview_files(
+    file_paths: list[str],
+    ttl_seconds: int = _TOKEN_TTL_SECONDS,
+    known_files: bool = False,
+) -> list[str | None]:
+    abs_paths: list[str | None] = []
+    for file_path in file_paths:
+        abs_path = os.path.abspath(file_path or "")
+        if known_files:
+            # The caller just listed these files, so only the extension is checked; a file removed
+            # since then is caught lazily by resolve_preview_file.
+            valid = os.path.splitext(abs_path)[1].lower() in _PREVIEWABLE_EXTENSIONS
+        else:
+            valid = _is_valid_preview_file(abs_path)
+        abs_paths.append(abs_path if valid else None)
+
+    ttl = max(int(ttl_seconds), _MIN_TTL_SECONDS)
+    now = time.time()
+    expires_at = now + ttl
+
+    tokens: list[str | None] = []
+    with _token_lock:
+        _prune_expired(now)
+
+        missing: list[int] = []
+        for position, abs_path in enumerate(abs_paths):
+            token = _path_to_token.get(abs_path) if abs_path else None
+            entry = _preview_tokens.get(token) if token else None
+            if entry is not None and entry.expires_at > now:
+                entry.expires_at = expires_at
+            elif abs_path:
+                if token:
+                    _remove_token(token)
+                token = None
+                missing.append(position)
+            tokens.append(token)
+
+        for position, token in zip(missing, _new_tokens(len(missing))):
+            abs_path = abs_paths[position]
+            existing = _path_to_token.get(abs_path)
+            if existing:
+                # The same path appeared twice in this batch.
+                tokens[position] = existing
+                continue
+            _preview_tokens[token] = _PreviewTokenEntry(path=abs_path, expires_at=expires_at)
+            _path_to_token[abs_path] = token
+            heapq.heappush(_expiry_heap, (expires_at, token))
+            tokens[position] = token
+    return tokens
+
+
 def resolve_preview_file(token: str, refresh_ttl_seconds: int = _TOKEN_TTL_SECONDS) -> str | None:
     clean_token = (token or "").strip()
     if not clean_token:
@@ -103,10 +163,12 @@ def resolve_preview_file(token: str, refresh_ttl_seconds: int = _TOKEN_TTL_SECON
         if not entry or entry.expires_at <= now:
             _remove_token(clean_token)
             return None
+        entry.expires_at = now + refresh_ttl
+        file_path = entry.path
 
-        if not _is_valid_preview_file(entry.path):
+    # Checked lazily here, outside the lock, instead of for every token during pruning.
+    if not _is_valid_preview_file(file_path):
+        with _token_lock:
             _remove_token(clean_token)
-            return None
-
-        entry.expires_at = now + refresh_ttl
-        return entry.path
+        return None
+    return file_path
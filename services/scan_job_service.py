@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .media_scan_service import ScanCancelled, ScanProgress, build_image_scan_payload, build_video_scan_payload
+
+_SCAN_WORKERS = 2
+_MAX_SCAN_JOBS = 64
+_FINISHED_JOB_TTL_SECONDS = 600
+
+SCAN_KINDS = {
+    "image": build_image_scan_payload,
+    "video": build_video_scan_payload,
+}
+
+# Scans walk the filesystem; keep them off the PromptServer event loop.
+_scan_executor = ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix="gugu-scan")
+
+
+@dataclass
+class ScanJob:
+    job_id: str
+    kind: str
+    progress: ScanProgress
+    future: Future
+    created_at: float
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "cancelling" if self.progress.cancelled else "running"
+        if self.future.cancelled():
+            return "cancelled"
+        error = self.future.exception()
+        if isinstance(error, ScanCancelled):
+            return "cancelled"
+        return "error" if error is not None else "done"
+
+    def to_payload(self) -> dict:
+        status = self.status
+        payload = {
+            "ok": True,
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": status,
+            "scanned": self.progress.scanned,
+        }
+        if status == "done":
+            payload["result"] = self.future.result()
+        elif status == "error":
+            payload["error"] = str(self.future.exception())
+        return payload
+
+
+_scan_jobs: OrderedDict[str, ScanJob] = OrderedDict()
+_scan_jobs_lock = threading.Lock()
+
+
+def submit_scan(
+    kind: str,
+    server_dir: str,
+    max_items: int,
+    progress: ScanProgress,
+    page_size: int = 0,
+    cursor: str = "",
+) -> Future:
+    return _scan_executor.submit(SCAN_KINDS[kind], server_dir, max_items, progress, page_size, cursor)
+
+
+def _prune_jobs(now: float) -> None:
+    expired = [
+        job_id
+        for job_id, job in _scan_jobs.items()
+        if job.future.done() and now - job.created_at > _FINISHED_JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        _scan_jobs.pop(job_id, None)
+
+    while len(_scan_jobs) > _MAX_SCAN_JOBS:
+        _, job = _scan_jobs.popitem(last=False)
+        job.progress.cancel()
+        job.future.cancel()
+
+
+def start_scan_job(kind: str, server_dir: str, max_items: int) -> ScanJob:
+    progress = ScanProgress()
+    job = ScanJob(
+        job_id=secrets.token_urlsafe(12),
+        kind=kind,
+        progress=progress,
+        future=submit_scan(kind, server_dir, max_items, progress),
+        created_at=time.time(),
+    )
+    with _scan_jobs_lock:
+        _scan_jobs[job.job_id] = job
+        _prune_jobs(job.created_at)
+    return job
+
+
+def get_scan_job(job_id: str) -> ScanJob | None:
+    with _scan_jobs_lock:
+        return _scan_jobs.get((job_id or "").strip())
+
+
+def cancel_scan_job(job_id: str) -> ScanJob | None:
+    job = get_scan_job(job_id)
+    if job is not None:
+        job.progress.cancel()
+        job.future.cancel()
+    return job
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+import folder_paths
+
+from ..core import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, new_sha256, read_env_int, stat_cache, update_hash_with_value
+from .pixel_convert import scaled_frame_size
+
+DEFAULT_THUMBNAIL_EDGE = 256
+MIN_THUMBNAIL_EDGE = 16
+MAX_THUMBNAIL_EDGE = 2048
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+_DEFAULT_THUMB_CACHE_MB = 512
+_THUMB_WORKERS = 4
+_TEMP_SUFFIX = ".tmp"
+_STALE_TEMP_SECONDS = 3600
+_ETAG_LENGTH = 32
+# The cache directory is configurable, so eviction only ever touches names this cache writes itself.
+_ENTRY_NAME = re.compile(rf"[0-9a-f]{{{_ETAG_LENGTH}}}\.(?:{'|'.join(THUMBNAIL_FORMATS)})")
+_TEMP_NAME = re.compile(rf"{_ENTRY_NAME.pattern}\.\d+\.[0-9a-f]{{8}}{re.escape(_TEMP_SUFFIX)}")
+
+_thumbnail_executor = ThreadPoolExecutor(max_workers=_THUMB_WORKERS, thread_name_prefix="gugu-thumb")
+
+
+@dataclass(frozen=True)
+class ThumbnailSpec:
+    source_path: str
+    max_edge: int
+    image_format: str
+    etag: str
+    last_modified: float
+
+    @property
+    def content_type(self) -> str:
+        return THUMBNAIL_FORMATS[self.image_format][1]
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self._cache_dir = os.path.abspath(cache_dir) if cache_dir else ""
+        self._max_bytes = max(int(max_bytes), 0)
+        self._total_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> str:
+        if not self._cache_dir:
+            self._cache_dir = os.path.join(folder_paths.get_temp_directory(), "gugu_thumbnails")
+        return self._cache_dir
+
+    def entry_path(self, spec: ThumbnailSpec) -> str:
+        return os.path.join(self.cache_dir, f"{spec.etag}.{spec.image_format}")
+
+    def get(self, spec: ThumbnailSpec) -> bytes | None:
+        entry_path = self.entry_path(spec)
+        try:
+            with open(entry_path, "rb") as handle:
+                data = handle.read()
+            os.utime(entry_path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, spec: ThumbnailSpec, data: bytes) -> None:
+        if self._max_bytes <= 0 or len(data) > self._max_bytes:
+            return
+
+        entry_path = self.entry_path(spec)
+        temp_path = f"{entry_path}.{os.getpid()}.{secrets.token_hex(4)}{_TEMP_SUFFIX}"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data)
+            if self._total_bytes is None or self._total_bytes > self._max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, str]] = []
+        stale_before = time.time() - _STALE_TEMP_SECONDS
+        try:
+            with os.scandir(self.cache_dir) as iterator:
+                for dir_entry in iterator:
+                    if not dir_entry.is_file():
+                        continue
+                    if _TEMP_NAME.fullmatch(dir_entry.name):
+                        if dir_entry.stat().st_mtime < stale_before:
+                            try:
+                                os.remove(dir_entry.path)
+                            except OSError:
+                                pass
+                    elif _ENTRY_NAME.fullmatch(dir_entry.name):
+                        stat = dir_entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+
+def clamp_thumbnail_edge(max_edge: int) -> int:
+    return min(max(int(max_edge), MIN_THUMBNAIL_EDGE), MAX_THUMBNAIL_EDGE)
+
+
+def thumbnail_spec(source_path: str, max_edge: int, image_format: str) -> ThumbnailSpec | None:
+    if image_format not in THUMBNAIL_FORMATS:
+        return None
+    stat = stat_cache.stat(source_path)
+    if stat is None:
+        return None
+
+    # The ETag doubles as the cache file name: same source bytes and options, same thumbnail.
+    abs_path = os.path.abspath(source_path)
+    hasher = new_sha256()
+    for value in (abs_path, stat.st_size, stat.st_mtime_ns, max_edge, image_format):
+        update_hash_with_value(hasher, value)
+    return ThumbnailSpec(
+        source_path=abs_path,
+        max_edge=max_edge,
+        image_format=image_format,
+        etag=hasher.hexdigest()[:_ETAG_LENGTH],
+        last_modified=stat.st_mtime,
+    )
+
+
+def _open_image_still(source_path: str, max_edge: int) -> Image.Image:
+    with Image.open(source_path) as img:
+        # JPEG can decode straight at a reduced scale, skipping most of the full-size work.
+        # The target keeps the aspect ratio, matching the box thumbnail() fits the image into.
+        img.draft("RGB", scaled_frame_size(img.width, img.height, max_edge))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge))
+        return img.convert("RGB")
+
+
+def _open_video_poster(source_path: str, max_edge: int) -> Image.Image | None:
+    import av
+
+    with av.open(source_path) as container:
+        video_stream = next((stream for stream in container.streams if stream.type == "video"), None)
+        if video_stream is None:
+            return None
+        for frame in container.decode(video_stream):
+            # Scaled in the same swscale pass as the RGB conversion instead of converting at full size first.
+            # AREA averages the source pixels like thumbnail() does, where the default bilinear would alias.
+            width, height = scaled_frame_size(frame.width, frame.height, max_edge)
+            return frame.to_image(width=width, height=height, interpolation="AREA")
+    return None
+
+
+def _render_thumbnail(spec: ThumbnailSpec) -> bytes | None:
+    ext = os.path.splitext(spec.source_path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        still = _open_image_still(spec.source_path, spec.max_edge)
+    elif ext in VIDEO_EXTENSIONS:
+        still = _open_video_poster(spec.source_path, spec.max_edge)
+    else:
+        return None
+    if still is None:
+        return None
+
+    buffer = BytesIO()
+    still.convert("RGB").save(buffer, format=THUMBNAIL_FORMATS[spec.image_format][0], quality=80)
+    return buffer.getvalue()
+
+
+def load_thumbnail(spec: ThumbnailSpec) -> bytes | None:
+    data = thumbnail_cache.get(spec)
+    if data is not None:
+        return data
+    try:
+        data = _render_thumbnail(spec)
+    except Exception:
+        # Undecodable sources (or no PyAV for videos) just have no thumbnail; callers fall back to the file.
+        return None
+    if data is not None:
+        thumbnail_cache.put(spec, data)
+    return data
+
+
+def submit_thumbnail(spec: ThumbnailSpec) -> Future:
+    return _thumbnail_executor.submit(load_thumbnail, spec)
+
+
+thumbnail_cache = ThumbnailCache(
+    os.environ.get("GUGU_BATCH_THUMB_CACHE_DIR", "").strip(),
+    read_env_int("GUGU_BATCH_THUMB_CACHE_MB", _DEFAULT_THUMB_CACHE_MB) * 1024 * 1024,
+)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..core import new_sha256, update_hash_with_file_stat, update_hash_with_value
+from .frame_buffer import FrameBatchBuilder
+from .video_service import VideoDecodeResult, load_video_frames
+
+_MAX_CURSOR_SETS = 32
+
+
+@dataclass(frozen=True)
+class VideoChunkCursor:
+    video_position: int
+    frame_offset: int
+    expected_hw: tuple[int, int] | None
+    # Source frame the current video resumes at; None starts it at the configured skip_frames.
+    next_frame: int | None = None
+
+
+@dataclass
+class VideoChunkResult:
+    output_names: list[str]
+    failed_names: list[str]
+    fps_values: list[float]
+    start: VideoChunkCursor
+    end: VideoChunkCursor
+
+
+# Window boundaries seen so far, per (video list, decode options), so chunk i+1 resumes where chunk i ended.
+_cursor_sets: OrderedDict[str, dict[int, VideoChunkCursor]] = OrderedDict()
+_cursor_lock = threading.Lock()
+
+
+def _cursor_key(entries: list[tuple[str, str | None]], chunk_size: int, decode_options: dict) -> str:
+    hasher = new_sha256()
+    update_hash_with_value(hasher, chunk_size)
+    for option in sorted(decode_options):
+        update_hash_with_value(hasher, option)
+        update_hash_with_value(hasher, decode_options[option])
+    for name, video_path in entries:
+        update_hash_with_value(hasher, name)
+        update_hash_with_value(hasher, video_path or "")
+        if video_path:
+            update_hash_with_file_stat(hasher, video_path)
+    return hasher.hexdigest()
+
+
+def _nearest_cursor(key: str, chunk_index: int) -> tuple[int, VideoChunkCursor]:
+    with _cursor_lock:
+        cursors = _cursor_sets.get(key)
+        if cursors:
+            _cursor_sets.move_to_end(key)
+            known = [index for index in cursors if index <= chunk_index]
+            if known:
+                best = max(known)
+                return best, cursors[best]
+    return 0, VideoChunkCursor(video_position=0, frame_offset=0, expected_hw=None)
+
+
+def _remember_cursor(key: str, chunk_index: int, cursor: VideoChunkCursor) -> None:
+    with _cursor_lock:
+        _cursor_sets.setdefault(key, {})[chunk_index] = cursor
+        _cursor_sets.move_to_end(key)
+        while len(_cursor_sets) > _MAX_CURSOR_SETS:
+            _cursor_sets.popitem(last=False)
+
+
+def _decode_from_offset(
+    video_path: str | None,
+    frame_offset: int,
+    next_frame: int | None,
+    limit: int,
+    expected_hw: tuple[int, int] | None,
+    output: FrameBatchBuilder | None,
+    decode_options: dict,
+) -> VideoDecodeResult | None:
+    if not video_path:
+        return None
+
+    # next_frame is the source index after the last emitted frame, so dropped frames never shift the grid.
+    skip_frames = decode_options["skip_frames"] if next_frame is None else next_frame
+    frame_load_cap = decode_options["frame_load_cap"]
+    if frame_load_cap > 0:
+        limit = min(limit, frame_load_cap - frame_offset)
+        if limit <= 0:
+            return VideoDecodeResult(frames=[], fps=0.0, expected_hw=expected_hw)
+
+    options = {**decode_options, "skip_frames": skip_frames, "frame_load_cap": limit}
+    frame_start = output.count if output is not None else 0
+    try:
+        return load_video_frames(
+            video_path=video_path,
+            expected_hw=expected_hw,
+            output=output,
+            count_only=output is None,
+            **options,
+        )
+    except ImportError:
+        raise
+    except Exception:
+        if output is not None:
+            output.truncate(frame_start)
+        return None
+
+
+def decode_video_chunk(
+    entries: list[tuple[str, str | None]],
+    chunk_size: int,
+    chunk_index: int,
+    output: FrameBatchBuilder,
+    decode_options: dict,
+) -> VideoChunkResult:
+    key = _cursor_key(entries, chunk_size, decode_options)
+    known_index, cursor = _nearest_cursor(key, chunk_index)
+    position = cursor.video_position
+    offset = cursor.frame_offset
+    next_frame = cursor.next_frame
+    expected_hw = cursor.expected_hw
+
+    # Walk forward from the nearest recorded boundary, counting frames without converting them.
+    to_skip = (chunk_index - known_index) * chunk_size
+    while to_skip > 0 and position < len(entries):
+        _, video_path = entries[position]
+        decode_result = _decode_from_offset(video_path, offset, next_frame, to_skip, expected_hw, None, decode_options)
+        counted = 0
+        if decode_result is not None:
+            expected_hw = decode_result.expected_hw
+            counted = decode_result.frame_count
+        if counted == to_skip:
+            # Stay on this video even if it ends exactly here; the next decode then finds no frames.
+            offset += to_skip
+            next_frame = decode_result.next_frame
+            to_skip = 0
+        else:
+            to_skip -= counted
+            position += 1
+            offset = 0
+            next_frame = None
+
+    start = VideoChunkCursor(
+        video_position=position, frame_offset=offset, expected_hw=expected_hw, next_frame=next_frame
+    )
+    _remember_cursor(key, chunk_index, start)
+
+    output_names: list[str] = []
+    failed_names: list[str] = []
+    fps_values: list[float] = []
+    needed = chunk_size
+    while needed > 0 and position < len(entries):
+        name, video_path = entries[position]
+        decode_result = _decode_from_offset(video_path, offset, next_frame, needed, expected_hw, output, decode_options)
+        if decode_result is None:
+            failed_names.append(name)
+            position += 1
+            offset = 0
+            next_frame = None
+            continue
+
+        expected_hw = decode_result.expected_hw
+        if decode_result.fps > 0:
+            fps_values.append(decode_result.fps)
+        if decode_result.frame_count == 0:
+            # Running out of frames mid-video is the normal end of that video, not a failure.
+            if offset == 0:
+                failed_names.append(name)
+            position += 1
+            offset = 0
+            next_frame = None
+            continue
+
+        output_names.append(name)
+        needed -= decode_result.frame_count
+        if needed > 0:
+            position += 1
+            offset = 0
+            next_frame = None
+        else:
+            offset += decode_result.frame_count
+            next_frame = decode_result.next_frame
+
+    end = VideoChunkCursor(
+        video_position=position, frame_offset=offset, expected_hw=expected_hw, next_frame=next_frame
+    )
+    _remember_cursor(key, chunk_index + 1, end)
+    return VideoChunkResult(
+        output_names=output_names,
+        failed_names=failed_names,
+        fps_values=fps_values,
+        start=start,
+        end=end,
+    )
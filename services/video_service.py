@@ -1,16 +1,196 @@
 from __future__ import annotations
 
+import itertools
 from dataclasses import dataclass
+from fractions import Fraction
+from typing import Iterator
 
-import numpy as np
 import torch
 
+from ..core import stage_stats
+from .frame_buffer import FrameBatchBuilder, RawFrameCollector
+from .frame_cache import (
+    CachedFrames,
+    frame_cache_can_keep,
+    frame_cache_key,
+    frame_caching_enabled,
+    lookup_cached_frames,
+    store_cached_frames,
+)
+from .media_probe_service import probe_media
+from .pixel_convert import scaled_frame_size, uint8_to_float_frames
+
 
 @dataclass
 class VideoDecodeResult:
     frames: list[torch.Tensor]
     fps: float
     expected_hw: tuple[int, int] | None
+    frame_count: int = 0
+    # Source frame index a follow-up decode starts at to continue the same sampling grid.
+    next_frame: int = 0
+
+
+def _import_av():
+    try:
+        import av
+    except ImportError as exc:
+        raise ImportError("PyAV is required for gugu_BatchLoadVideos. Install with: pip install av") from exc
+    return av
+
+
+@dataclass(frozen=True)
+class _FrameClock:
+    start_pts: int
+    frame_ticks: Fraction
+    constant_rate: bool
+
+    def index_of(self, pts: int) -> int:
+        return round((pts - self.start_pts) / self.frame_ticks)
+
+    def seek_pts(self, frame_index: int) -> int:
+        # Aim half a frame early so rounded timestamps never put the target keyframe out of reach.
+        return max(self.start_pts + int((frame_index - Fraction(1, 2)) * self.frame_ticks), self.start_pts)
+
+
+def _frame_clock(video_stream) -> _FrameClock | None:
+    rate = video_stream.average_rate or video_stream.base_rate
+    time_base = video_stream.time_base
+    if not rate or not time_base:
+        return None
+    return _FrameClock(
+        start_pts=video_stream.start_time or 0,
+        frame_ticks=1 / (Fraction(rate) * Fraction(time_base)),
+        # Timestamp-derived indices only match decode order for constant frame rates.
+        constant_rate=video_stream.average_rate is not None and video_stream.base_rate == video_stream.average_rate,
+    )
+
+
+def _seek_past_frames(container, video_stream, clock: _FrameClock, skip_frames: int) -> Iterator | None:
+    container.seek(clock.seek_pts(skip_frames), backward=True, any_frame=False, stream=video_stream)
+
+    decoded = container.decode(video_stream)
+    for frame in decoded:
+        if frame.pts is None:
+            break
+        frame_index = clock.index_of(frame.pts)
+        if frame_index < skip_frames:
+            continue
+        if frame_index == skip_frames:
+            return itertools.chain((frame,), decoded)
+        # Landed past the target (sparse keyframes or a gap): fall back to counting from the start.
+        break
+    else:
+        return iter(())
+
+    container.seek(0)
+    return None
+
+
+def _iter_exact_frames(
+    container,
+    video_stream,
+    clock: _FrameClock | None,
+    skip_frames: int,
+    select_every_nth: int,
+    fast_seek: bool,
+) -> Iterator:
+    frame_iter = None
+    if fast_seek and skip_frames > 0 and clock is not None and clock.constant_rate:
+        frame_iter = _seek_past_frames(container, video_stream, clock, skip_frames)
+    if frame_iter is None:
+        frame_iter = itertools.islice(container.decode(video_stream), skip_frames, None)
+
+    for post_skip_index, frame in enumerate(frame_iter):
+        if select_every_nth > 1 and (post_skip_index % select_every_nth) != 0:
+            continue
+        yield skip_frames + post_skip_index, frame
+
+
+class _ApproximateSampler:
+    def __init__(self, clock: _FrameClock, skip_frames: int, select_every_nth: int) -> None:
+        self._clock = clock
+        self._skip_frames = skip_frames
+        self._select_every_nth = select_every_nth
+        self._next_index = skip_frames
+
+    def wants(self, pts: int | None) -> bool:
+        return pts is not None and self._clock.index_of(pts) >= self._next_index
+
+    def take(self, pts: int) -> None:
+        offset = self._clock.index_of(pts) - self._skip_frames
+        self._next_index = self._skip_frames + (offset // self._select_every_nth + 1) * self._select_every_nth
+
+
+def _decode_wanted_packets(container, video_stream, sampler: _ApproximateSampler) -> Iterator:
+    # Intra-only streams have no inter-frame references, so unwanted packets never need decoding.
+    for packet in container.demux(video_stream):
+        if packet.pts is not None and not sampler.wants(packet.pts):
+            continue
+        yield from packet.decode()
+
+
+def _iter_approximate_frames(
+    container,
+    video_stream,
+    clock: _FrameClock,
+    skip_frames: int,
+    select_every_nth: int,
+    fast_seek: bool,
+) -> Iterator:
+    sampler = _ApproximateSampler(clock, skip_frames, select_every_nth)
+    video_stream.codec_context.skip_frame = "NONREF"
+    if fast_seek and skip_frames > 0:
+        container.seek(clock.seek_pts(skip_frames), backward=True, any_frame=False, stream=video_stream)
+
+    if getattr(video_stream.codec_context.codec, "intra_only", False):
+        frame_iter = _decode_wanted_packets(container, video_stream, sampler)
+    else:
+        frame_iter = container.decode(video_stream)
+
+    for frame in frame_iter:
+        if not sampler.wants(frame.pts):
+            continue
+        sampler.take(frame.pts)
+        yield clock.index_of(frame.pts), frame
+
+
+def estimate_video_frame_count(
+    video_path: str,
+    skip_frames: int,
+    frame_load_cap: int,
+    select_every_nth: int,
+) -> int:
+    _import_av()
+    probe = probe_media(video_path, kind="video")
+    if probe is None:
+        return 0
+
+    total = probe.frame_count
+    if total <= 0:
+        return frame_load_cap if frame_load_cap > 0 else 0
+
+    available = max(total - skip_frames, 0)
+    selected = -(-available // max(select_every_nth, 1))
+    if frame_load_cap > 0:
+        return min(selected, frame_load_cap)
+    return selected
+
+
+def estimate_decoded_video_bytes(
+    video_path: str,
+    skip_frames: int,
+    frame_load_cap: int,
+    select_every_nth: int,
+    max_edge: int = 0,
+) -> int:
+    # Size of the selected frames as uint8 RGB, from the header alone; 0 when the header cannot tell.
+    frame_count = estimate_video_frame_count(video_path, skip_frames, frame_load_cap, select_every_nth)
+    probe = probe_media(video_path, kind="video")
+    if frame_count <= 0 or probe is None or probe.width <= 0 or probe.height <= 0:
+        return 0
+    width, height = scaled_frame_size(probe.width, probe.height, max_edge)
+    return frame_count * width * height * 3
 
 
 def decode_video_frames(
@@ -19,19 +199,24 @@ def decode_video_frames(
     frame_load_cap: int,
     select_every_nth: int,
     expected_hw: tuple[int, int] | None = None,
+    output: FrameBatchBuilder | RawFrameCollector | None = None,
+    fast_seek: bool = False,
+    approximate_sampling: bool = False,
+    codec_threads: int | None = None,
+    count_only: bool = False,
+    max_edge: int = 0,
 ) -> VideoDecodeResult:
-    try:
-        import av
-    except ImportError as exc:
-        raise ImportError("PyAV is required for gugu_BatchLoadVideos. Install with: pip install av") from exc
+    av = _import_av()
 
     frames: list[torch.Tensor] = []
     fps_value = 0.0
-    decoded_index = 0
     loaded_count = 0
+    next_frame = skip_frames
     resolved_hw = expected_hw
 
-    with av.open(video_path) as container:
+    with stage_stats.stage("video_open"):
+        container = av.open(video_path)
+    with container:
         video_stream = next((stream for stream in container.streams if stream.type == "video"), None)
         if video_stream is None:
             return VideoDecodeResult([], 0.0, expected_hw)
@@ -41,30 +226,132 @@ def decode_video_frames(
         elif video_stream.base_rate is not None:
             fps_value = float(video_stream.base_rate)
 
-        for frame in container.decode(video_stream):
-            if decoded_index < skip_frames:
-                decoded_index += 1
-                continue
-
-            post_skip_index = decoded_index - skip_frames
-            decoded_index += 1
+        if codec_threads is not None:
+            # Opt-in only: frame threading adds latency and per-thread frame buffers on short clips.
+            codec_context = video_stream.codec_context
+            codec_context.thread_type = "AUTO"
+            codec_context.thread_count = max(int(codec_threads), 0)
 
-            if select_every_nth > 1 and (post_skip_index % select_every_nth) != 0:
-                continue
+        clock = _frame_clock(video_stream)
+        if approximate_sampling and select_every_nth > 1 and clock is not None:
+            frame_iter = _iter_approximate_frames(
+                container, video_stream, clock, skip_frames, select_every_nth, fast_seek
+            )
+        else:
+            frame_iter = _iter_exact_frames(container, video_stream, clock, skip_frames, select_every_nth, fast_seek)
 
-            rgb = frame.to_ndarray(format="rgb24")
-            h, w = rgb.shape[0], rgb.shape[1]
+        # Only selected frames of the expected size reach the rgb24 conversion below.
+        # Demuxing, decoding and skipping unselected frames all count towards "video_decode".
+        step = max(select_every_nth, 1)
+        for source_index, frame in stage_stats.timed_iter("video_decode", frame_iter):
+            # Sizes are compared after scaling, so sources that shrink to the same size can share a batch.
+            w, h = scaled_frame_size(frame.width, frame.height, max_edge)
 
             if resolved_hw is None:
                 resolved_hw = (h, w)
             if (h, w) != resolved_hw:
                 continue
 
-            arr = rgb.astype(np.float32) / 255.0
-            frames.append(torch.from_numpy(arr)[None,])
+            if not count_only:
+                # Scaling happens in the same swscale pass as the rgb24 conversion.
+                with stage_stats.stage("video_convert") as stage:
+                    rgb = frame.to_ndarray(format="rgb24", width=w, height=h)
+                    stage.add_bytes(rgb.nbytes)
+                if output is not None:
+                    output.extend_uint8(rgb[None,])
+                else:
+                    frames.append(uint8_to_float_frames(rgb[None,]))
             loaded_count += 1
+            # Resume after the last frame actually emitted, so frames dropped above never shift the grid.
+            next_frame = skip_frames + ((source_index - skip_frames) // step + 1) * step
 
             if frame_load_cap > 0 and loaded_count >= frame_load_cap:
                 break
 
-    return VideoDecodeResult(frames=frames, fps=fps_value, expected_hw=resolved_hw)
+    stage_stats.count("video_frames", loaded_count)
+    return VideoDecodeResult(
+        frames=frames,
+        fps=fps_value,
+        expected_hw=resolved_hw,
+        frame_count=loaded_count,
+        next_frame=next_frame,
+    )
+
+
+def load_video_frames(
+    video_path: str,
+    skip_frames: int,
+    frame_load_cap: int,
+    select_every_nth: int,
+    expected_hw: tuple[int, int] | None = None,
+    output: FrameBatchBuilder | RawFrameCollector | None = None,
+    fast_seek: bool = False,
+    approximate_sampling: bool = False,
+    codec_threads: int | None = None,
+    count_only: bool = False,
+    max_edge: int = 0,
+) -> VideoDecodeResult:
+    decode_options = {
+        "skip_frames": skip_frames,
+        "frame_load_cap": frame_load_cap,
+        "select_every_nth": select_every_nth,
+        "expected_hw": expected_hw,
+        "fast_seek": fast_seek,
+        "approximate_sampling": approximate_sampling,
+        "max_edge": max_edge,
+    }
+    if output is None or count_only or not frame_caching_enabled():
+        return decode_video_frames(
+            video_path, output=output, codec_threads=codec_threads, count_only=count_only, **decode_options
+        )
+
+    cache_key = frame_cache_key("video", video_path, **decode_options)
+    cached = lookup_cached_frames(cache_key)
+    # Disk entries written before next_frame was recorded cannot resume a chunk; decode them again.
+    if cached is not None and cached.next_frame is not None:
+        stage_stats.count("frame_cache_hits")
+        for chunk in cached.chunks:
+            output.extend_uint8(chunk)
+        return VideoDecodeResult(
+            frames=[],
+            fps=cached.fps,
+            expected_hw=cached.expected_hw,
+            frame_count=cached.frame_count,
+            next_frame=cached.next_frame,
+        )
+
+    if cache_key is not None:
+        stage_stats.count("frame_cache_misses")
+    if isinstance(output, RawFrameCollector):
+        # Already uint8: the new chunks can be cached as they are, without a staging copy.
+        chunk_start = len(output.chunks)
+        result = decode_video_frames(video_path, output=output, codec_threads=codec_threads, **decode_options)
+        store_cached_frames(
+            cache_key,
+            CachedFrames(
+                chunks=output.chunks[chunk_start:],
+                fps=result.fps,
+                expected_hw=result.expected_hw,
+                next_frame=result.next_frame,
+            ),
+        )
+        return result
+
+    estimated_bytes = estimate_decoded_video_bytes(
+        video_path, skip_frames, frame_load_cap, select_every_nth, max_edge
+    )
+    if cache_key is None or not frame_cache_can_keep(estimated_bytes):
+        # No cache would keep this entry (or its size is unknown): convert straight into the output.
+        return decode_video_frames(video_path, output=output, codec_threads=codec_threads, **decode_options)
+
+    # Decode into uint8 first so the same frames can be kept for the next run.
+    collector = RawFrameCollector()
+    result = decode_video_frames(video_path, output=collector, codec_threads=codec_threads, **decode_options)
+    store_cached_frames(
+        cache_key,
+        CachedFrames(
+            chunks=collector.chunks, fps=result.fps, expected_hw=result.expected_hw, next_frame=result.next_frame
+        ),
+    )
+    collector.drain_into(output)
+    return result
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import types
+
+# Stand-ins for the ComfyUI host modules. pytest imports the repo root as a package (it has an
+# __init__.py), which registers the nodes and routes, so these must exist before collection.
+_INPUT_DIR = tempfile.mkdtemp(prefix="gugu_batch_tests_")
+
+
+def _install_host_stubs() -> None:
+    from aiohttp import web
+
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_input_directory = lambda: _INPUT_DIR
+    folder_paths.get_temp_directory = lambda: _INPUT_DIR
+    folder_paths.get_annotated_filepath = lambda name: os.path.join(_INPUT_DIR, name)
+    folder_paths.exists_annotated_filepath = lambda name: os.path.exists(os.path.join(_INPUT_DIR, name))
+
+    node_helpers = types.ModuleType("node_helpers")
+    node_helpers.pillow = lambda fn, arg: fn(arg)
+
+    server = types.ModuleType("server")
+    server.PromptServer = types.SimpleNamespace(instance=types.SimpleNamespace(routes=web.RouteTableDef()))
+
+    sys.modules.setdefault("folder_paths", folder_paths)
+    sys.modules.setdefault("node_helpers", node_helpers)
+    sys.modules.setdefault("server", server)
+
+
+try:
+    _install_host_stubs()
+except ImportError:
+    pass
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+test_utils = pytest.importorskip("aiohttp.test_utils")
+# The services package pulls in the decode stack the ComfyUI host normally provides.
+pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("PIL")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PACKAGE_NAME = "gugu_batch_tests"
+_VIEW_PROXY_PATH = "/mogu_batch_process/view_proxy"
+_FILE_BYTES = bytes(range(256)) * 4
+
+
+def _server_routes_module() -> types.ModuleType:
+    # Reuse the module pytest registered the routes from: a second import would keep its own token table.
+    for route in sys.modules["server"].PromptServer.instance.routes:
+        if getattr(route, "path", None) == _VIEW_PROXY_PATH:
+            return sys.modules[route.handler.__module__]
+    package = types.ModuleType(_PACKAGE_NAME)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[_PACKAGE_NAME] = package
+    return importlib.import_module(f"{_PACKAGE_NAME}.server_routes")
+
+
+@pytest.fixture(scope="module")
+def preview(tmp_path_factory):
+    file_path = str(tmp_path_factory.mktemp("previews") / "clip.png")
+    with open(file_path, "wb") as handle:
+        handle.write(_FILE_BYTES)
+
+    server_routes = _server_routes_module()
+    services = importlib.import_module(f"{server_routes.__package__}.services")
+    proxy_id = services.register_preview_files([file_path])[0]
+    return sys.modules["server"].PromptServer.instance.routes, proxy_id
+
+
+def _get_preview(preview, headers: dict[str, str] | None = None):
+    routes, proxy_id = preview
+
+    async def fetch():
+        app = web.Application()
+        app.add_routes(routes)
+        async with test_utils.TestClient(test_utils.TestServer(app)) as client:
+            response = await client.get(_VIEW_PROXY_PATH, params={"id": proxy_id}, headers=headers or {})
+            return response.status, response.headers.copy(), await response.read()
+
+    return asyncio.run(fetch())
+
+
+def test_if_range_with_current_etag_serves_range(preview):
+    _, headers, _ = _get_preview(preview)
+
+    status, _, body = _get_preview(preview, {"Range": "bytes=0-9", "If-Range": headers["ETag"]})
+
+    assert status == 206
+    assert body == _FILE_BYTES[:10]
+
+
+@pytest.mark.parametrize("if_range", ['"stale"', 'W/"stale"'])
+def test_if_range_with_mismatched_etag_serves_full_file(preview, if_range):
+    status, headers, body = _get_preview(preview, {"Range": "bytes=0-9", "If-Range": if_range})
+
+    assert status == 200
+    assert body == _FILE_BYTES
+    assert "Content-Range" not in headers
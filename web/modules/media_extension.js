@@ -25,6 +25,7 @@ const DOM_DELTA_LINE = wheelCtor ? wheelCtor.DOM_DELTA_LINE : 1;
 const DOM_DELTA_PAGE = wheelCtor ? wheelCtor.DOM_DELTA_PAGE : 2;
 const THUMB_MEDIA_LAYER = 1;
 const THUMB_ACTION_LAYER = 3;
+const THUMBNAIL_MAX_EDGE = 256;
 
 let isGlobalWheelCaptureBound = false;
 
@@ -40,6 +41,19 @@ function buildProxyViewUrl(previewId) {
     return api.apiURL(`/mogu_batch_process/view_proxy?id=${encodeURIComponent(previewId)}`);
 }
 
+function buildProxyThumbnailUrl(previewId) {
+    return api.apiURL(
+        `/mogu_batch_process/thumbnail?id=${encodeURIComponent(previewId)}&max_edge=${THUMBNAIL_MAX_EDGE}`
+    );
+}
+
+function getPreviewProxyId(previewHint) {
+    if (previewHint && typeof previewHint === "object" && typeof previewHint.proxy_id === "string") {
+        return previewHint.proxy_id.trim();
+    }
+    return "";
+}
+
 function parsePreviewFilePath(previewHint) {
     const filename = String(previewHint?.filename || "").trim();
     if (!filename) return null;
@@ -406,7 +420,14 @@ function createBrowserUI(node) {
             const previewHint = name in cachedPreviews ? cachedPreviews[name] : undefined;
             if (!isVideo) {
                 const img = document.createElement("img");
-                img.src = resolvePreviewUrl(name, previewHint);
+                const proxyId = getPreviewProxyId(previewHint);
+                if (proxyId) {
+                    // Grid tiles load a small server-side thumbnail; the original is only a fallback.
+                    img.src = buildProxyThumbnailUrl(proxyId);
+                    img.addEventListener("error", () => (img.src = buildProxyViewUrl(proxyId)), { once: true });
+                } else {
+                    img.src = resolvePreviewUrl(name, previewHint);
+                }
                 img.style.cssText = `position:relative;z-index:${THUMB_MEDIA_LAYER};width:100%;height:100%;object-fit:cover;display:block;`;
                 img.draggable = false;
                 thumb.appendChild(img);
@@ -558,10 +579,12 @@ export function registerBatchLoadMediaExtension() {
                     if (!getWidgetByName(this, scanWidgetName)) {
                         this.addWidget("button", scanWidgetName, null, () => {
                             runWithUiError("Scan failed", async () => {
-                                const result = await scanServerMediaDir(this);
-                                ui.setPreviews(result.previews);
-                                const changed = setMediaList(this, result.items);
-                                if (!changed) ui.redraw();
+                                // Each page is shown as soon as it arrives; later pages extend the list.
+                                await scanServerMediaDir(this, (items, previews) => {
+                                    ui.setPreviews(previews);
+                                    const changed = setMediaList(this, items);
+                                    if (!changed) ui.redraw();
+                                });
                             });
                         });
                     }
@@ -1,6 +1,8 @@
 import { api } from "../../../../scripts/api.js";
 import { buildInputViewUrl, parseInputPath } from "./media_view_url.js";
 
+const POSTER_MAX_EDGE = 256;
+
 function createVideoFallbackIcon() {
     const icon = document.createElement("div");
     icon.textContent = "VIDEO";
@@ -12,6 +14,12 @@ function buildProxyViewUrl(previewId) {
     return api.apiURL(`/mogu_batch_process/view_proxy?id=${encodeURIComponent(previewId)}`);
 }
 
+function buildProxyThumbnailUrl(previewId) {
+    return api.apiURL(
+        `/mogu_batch_process/thumbnail?id=${encodeURIComponent(previewId)}&max_edge=${POSTER_MAX_EDGE}`
+    );
+}
+
 function parsePreviewFilePath(previewHint) {
     const filename = String(previewHint?.filename || "").trim();
     if (!filename) return null;
@@ -22,7 +30,8 @@ function parsePreviewFilePath(previewHint) {
 function parsePreviewHint(path, previewHint) {
     if (previewHint === false) return { url: "" };
     if (previewHint && typeof previewHint === "object" && typeof previewHint.proxy_id === "string" && previewHint.proxy_id.trim()) {
-        return { url: buildProxyViewUrl(previewHint.proxy_id.trim()) };
+        const proxyId = previewHint.proxy_id.trim();
+        return { url: buildProxyViewUrl(proxyId), posterUrl: buildProxyThumbnailUrl(proxyId) };
     }
     if (previewHint && typeof previewHint === "object" && typeof previewHint.filename === "string" && previewHint.filename.trim()) {
         const parsedHint = parsePreviewFilePath(previewHint);
@@ -49,7 +58,13 @@ export function createVideoThumb(path, previewHint) {
     video.muted = true;
     video.loop = true;
     video.playsInline = true;
-    video.preload = "metadata";
+    if (resolved.posterUrl) {
+        // The poster comes from the server; the video itself is only fetched once hovered.
+        video.poster = resolved.posterUrl;
+        video.preload = "none";
+    } else {
+        video.preload = "metadata";
+    }
     video.disablePictureInPicture = true;
     video.style.cssText = "width:100%;height:100%;object-fit:cover;display:block;";
 
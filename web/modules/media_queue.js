@@ -93,17 +93,11 @@ function getScanConfig(node) {
     };
 }
 
-export async function scanServerMediaDir(node) {
-    const scanConfig = getScanConfig(node);
-    const serverDir = String(getWidgetByName(node, scanConfig.dirKey)?.value || "").trim();
-    if (!serverDir) {
-        throw new Error(`${scanConfig.dirKey} is empty`);
-    }
-    if (/[\u0000\r\n]/.test(serverDir)) {
-        throw new Error(`${scanConfig.dirKey} contains invalid control characters`);
-    }
+// First page is small so the list shows up quickly; later pages grow to keep request count low.
+const SCAN_FIRST_PAGE_SIZE = 200;
+const SCAN_MAX_PAGE_SIZE = 5000;
 
-    const maxCount = getMaxMediaCountValue(node);
+async function fetchScanPage(scanConfig, serverDir, maxCount, pageSize, cursor) {
     const response = await api.fetchApi(scanConfig.endpoint, {
         method: "POST",
         headers: {
@@ -112,6 +106,8 @@ export async function scanServerMediaDir(node) {
         body: JSON.stringify({
             [scanConfig.dirKey]: serverDir,
             [scanConfig.maxKey]: maxCount,
+            page_size: pageSize,
+            cursor: cursor || "",
         }),
     });
 
@@ -127,13 +123,55 @@ export async function scanServerMediaDir(node) {
         throw new Error(message);
     }
 
-    const items = Array.isArray(payload?.items) ? payload.items : [];
-    const previews = payload?.previews && typeof payload.previews === "object" ? payload.previews : {};
+    return {
+        items: Array.isArray(payload?.items) ? payload.items : [],
+        previews: payload?.previews && typeof payload.previews === "object" ? payload.previews : {},
+        total: typeof payload?.total === "number" ? payload.total : null,
+        totalKnown: payload?.total_known !== false,
+        truncated: payload?.truncated === true,
+        nextCursor: typeof payload?.next_cursor === "string" && payload.next_cursor ? payload.next_cursor : null,
+    };
+}
+
+export async function scanServerMediaDir(node, onPage) {
+    const scanConfig = getScanConfig(node);
+    const serverDir = String(getWidgetByName(node, scanConfig.dirKey)?.value || "").trim();
+    if (!serverDir) {
+        throw new Error(`${scanConfig.dirKey} is empty`);
+    }
+    if (/[\u0000\r\n]/.test(serverDir)) {
+        throw new Error(`${scanConfig.dirKey} contains invalid control characters`);
+    }
+
+    // A newer Scan click supersedes this one; stop fetching pages for it.
+    const scanId = (node._batchLoadImagesScanId || 0) + 1;
+    node._batchLoadImagesScanId = scanId;
+
+    const maxCount = getMaxMediaCountValue(node);
+    const items = [];
+    const previews = {};
+    let pageSize = SCAN_FIRST_PAGE_SIZE;
+    let cursor = null;
+    let page = null;
+    do {
+        page = await fetchScanPage(scanConfig, serverDir, maxCount, pageSize, cursor);
+        if (node._batchLoadImagesScanId !== scanId) break;
+
+        items.push(...page.items);
+        Object.assign(previews, page.previews);
+        onPage?.(items, previews);
+
+        cursor = page.nextCursor;
+        pageSize = Math.min(pageSize * 2, SCAN_MAX_PAGE_SIZE);
+    } while (cursor);
+
     return {
         items,
         previews,
-        count: typeof payload?.count === "number" ? payload.count : items.length,
-        total: typeof payload?.total === "number" ? payload.total : items.length,
+        count: items.length,
+        total: typeof page?.total === "number" ? page.total : items.length,
+        totalKnown: page ? page.totalKnown : true,
+        truncated: page?.truncated === true,
     };
 }
 